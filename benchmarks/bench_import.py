@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""위젯 모듈 import 시간 측정 및 회귀 검사 (python -X importtime 기반)
+
+Orange/Qt 기본 모듈을 먼저 import한 뒤 각 위젯 모듈을 import하고,
+그 뒤에 새로 로드된 모듈만 애드온 비용으로 집계함. 저장소 루트에서:
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --budget-ms 30
+
+무거운 의존성(openai, dotenv, PIL, serial, cv2)이 위젯 import 시점에 로드되거나
+애드온 import 시간이 --budget-ms를 넘으면 종료 코드 1을 반환함.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+WIDGET_MODULES = [
+    "orangecontrib.orange3example.widgets",
+    "orangecontrib.orange3example.widgets.owllmtransformer",
+    "orangecontrib.orange3example.widgets.owimagellm",
+    "orangecontrib.orange3example.widgets.owmicrobit",
+    "orangecontrib.orange3example.widgets.owwebcam",
+]
+# Orange 자체가 항상 import하는 모듈 (애드온 비용에서 제외)
+BASELINE_MODULES = [
+    "numpy",
+    "AnyQt.QtCore",
+    "AnyQt.QtGui",
+    "AnyQt.QtWidgets",
+    "Orange.data",
+    "Orange.widgets.widget",
+    "Orange.widgets.gui",
+    "Orange.widgets.settings",
+    "Orange.widgets.utils.concurrent",
+    "orangewidget.workflow.config",
+]
+HEAVY_MODULES = ["openai", "dotenv", "PIL", "serial", "cv2", "pkg_resources"]
+MARKER = "--- orange3example import start ---"
+
+
+def measure(module: str) -> dict:
+    """새 인터프리터에서 module을 import하고 (총 self 시간, 로드된 모듈 목록) 반환"""
+    code = "; ".join(
+        [f"import {name}" for name in BASELINE_MODULES]
+        + [f"import sys; sys.stderr.write({MARKER!r} + '\\n')", f"import {module}"]
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{process.stderr[-2000:]}")
+
+    lines = process.stderr.splitlines()
+    lines = lines[lines.index(MARKER) + 1:]
+    total_us = 0
+    loaded = {}
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # 헤더 줄
+        self_us = int(fields[0])
+        name = fields[2].strip()
+        total_us += self_us
+        loaded[name] = self_us
+    heavy = sorted({name.split(".")[0] for name in loaded} & set(HEAVY_MODULES))
+    slowest = sorted(loaded.items(), key=lambda item: -item[1])[:5]
+    return {
+        "import_ms": round(total_us / 1000, 2),
+        "modules_loaded": len(loaded),
+        "heavy_modules": heavy,
+        "slowest": [(name, round(us / 1000, 2)) for name, us in slowest],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=25.0,
+                        help="위젯 모듈 하나당 허용하는 애드온 import 시간")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="반복 측정 후 최솟값 사용 (캐시/노이즈 영향 감소)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {}
+    failed = False
+    for module in WIDGET_MODULES:
+        runs = [measure(module) for _ in range(max(1, args.repeat))]
+        result = min(runs, key=lambda run: run["import_ms"])
+        result["over_budget"] = result["import_ms"] > args.budget_ms
+        results[module] = result
+        failed |= result["over_budget"] or bool(result["heavy_modules"])
+        if not args.json:
+            status = "OK" if not (result["over_budget"] or result["heavy_modules"]) else "FAIL"
+            print(f"{status:4s} {module:58s} {result['import_ms']:8.2f} ms  "
+                  f"{result['modules_loaded']:4d} modules"
+                  + (f"  heavy: {', '.join(result['heavy_modules'])}" if result["heavy_modules"] else ""))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Image LLM 처리 경로의 처리량/지연 측정: 순차 실행 vs 단계별 파이프라인
+
+API 요청은 고정 지연(--latency)으로 흉내 내고, 웹캠처럼 --fps로 프레임을 계속 제출함.
+네트워크/API 키 없이 실행 가능 (Pillow 필요). 저장소 루트에서:
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --latency 0.8 --in-flight 4 --width 1280 --height 720
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from orangecontrib.orange3example.utils.pipeline import StagedPipeline, encode_png_base64
+
+
+def make_frames(count, width, height, seed=0):
+    """웹캠 프레임과 비슷하게 부드러운 그라디언트 + 약한 노이즈"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    frames = []
+    for index in range(count):
+        base = (x + y + 8 * index) % 256
+        noise = rng.integers(0, 8, (height, width))
+        frame = np.stack([base, (base + 85) % 256, (base + 170) % 256], axis=-1) + noise[..., None]
+        frames.append(np.clip(frame, 0, 255).astype(np.uint8))
+    return frames
+
+
+def fake_request(latency):
+    def request(job, encoded):
+        time.sleep(latency)
+        return [f"{len(encoded)} bytes"]
+    return request
+
+
+def run_sequential(frames, args):
+    """기존 process(): 인코딩 -> 요청 -> 조립을 한 스레드에서 차례로"""
+    request = fake_request(args.latency)
+    latencies = []
+    start = time.perf_counter()
+    count = 0
+    while time.perf_counter() - start < args.duration:
+        submitted = time.perf_counter()
+        encoded = encode_png_base64(frames[count % len(frames)])
+        request(None, encoded)
+        latencies.append(time.perf_counter() - submitted)
+        count += 1
+    elapsed = time.perf_counter() - start
+    return {"results": count, "results_per_sec": count / elapsed,
+            "latency_mean_ms": 1000 * sum(latencies) / len(latencies), "dropped": 0}
+
+
+def run_pipeline(frames, args):
+    pipeline = StagedPipeline(encode_png_base64, fake_request(args.latency),
+                              lambda job, result, error: result,
+                              max_in_flight=args.in_flight, queue_size=1)
+    pipeline.start()
+    start = time.perf_counter()
+    index = 0
+    results = 0
+    while time.perf_counter() - start < args.duration:
+        pipeline.submit(frames[index % len(frames)])
+        index += 1
+        time.sleep(1 / args.fps)
+        results += len(pipeline.poll())
+    elapsed = time.perf_counter() - start
+    stats = pipeline.stats()
+    pipeline.stop()
+    return {"results": results, "results_per_sec": results / elapsed,
+            "latency_mean_ms": stats.get("total_ms"), "dropped": stats["dropped"] + stats["stale"],
+            "encode_ms": stats.get("encode_ms"), "request_ms": stats.get("request_ms")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--latency", type=float, default=0.5, help="흉내 낸 API 응답 시간(초)")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--in-flight", type=int, default=2)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    frames = make_frames(8, args.width, args.height)
+    results = {"sequential": run_sequential(frames, args), "pipeline": run_pipeline(frames, args)}
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name, result in results.items():
+            print(f"{name:12s} {result['results']:5d} results  "
+                  f"{result['results_per_sec']:6.2f} results/s  "
+                  f"latency {result['latency_mean_ms'] or 0:8.1f} ms  "
+                  f"dropped {result['dropped']:5d}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
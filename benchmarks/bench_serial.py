@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""가상 마이크로비트(pty)로 시리얼 송수신 경로의 처리량/지연/CPU 사용량 측정
+
+하드웨어 없이 실행 가능 (POSIX, pyserial 필요). 저장소 루트에서:
+
+    python -m benchmarks.bench_serial
+    python -m benchmarks.bench_serial -n 2000 --baudrate 0 --scenario pool_text pool_binary
+"""
+import argparse
+import json
+import re
+import threading
+import time
+
+import serial
+
+from orangecontrib.orange3example.utils import microbit
+from orangecontrib.orange3example.utils.microbit_pool import MicrobitDevice
+from orangecontrib.orange3example.utils.telemetry import SensorRingBuffer, parse_line
+from orangecontrib.orange3example.utils.virtual_microbit import VirtualMicrobit
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def wait_for(condition, timeout):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+class LatencyRecorder:
+    """메시지 순번별 송신 시각과 받는 쪽의 수신 시각으로 단방향 지연 측정"""
+
+    def __init__(self):
+        self.latencies = []
+        self._sent = {}
+        self._lock = threading.Lock()
+
+    def sent(self, sequence: int):
+        """전송 직전에 호출 (수신 콜백이 먼저 불려도 매칭되도록)"""
+        with self._lock:
+            self._sent[sequence] = time.perf_counter()
+
+    def received(self, sequence: int):
+        now = time.perf_counter()
+        with self._lock:
+            start = self._sent.pop(sequence, None)
+            if start is not None:
+                self.latencies.append(now - start)
+
+    def on_command(self, command: str):
+        """VirtualMicrobit on_command 콜백: 'm<순번>' 명령의 장치 수신 시각"""
+        if command.startswith("m") and command[1:].isdigit():
+            self.received(int(command[1:]))
+
+
+class Measurement:
+    """벽시계 시간과 프로세스 CPU 시간 측정 (CPU에는 가상 장치 스레드도 포함됨)"""
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+
+    def result(self, count, latencies=(), **extra):
+        result = {
+            "messages": count,
+            "seconds": round(self.wall, 4),
+            "messages_per_sec": round(count / self.wall, 1) if self.wall else None,
+            "cpu_seconds": round(self.cpu, 4),
+            "cpu_ms_per_message": round(1000 * self.cpu / count, 4) if count else None,
+        }
+        for q in (50, 90, 99):
+            value = percentile(list(latencies), q)
+            result[f"latency_p{q}_ms"] = round(1000 * value, 3) if value is not None else None
+        result.update(extra)
+        return result
+
+
+def bench_legacy_send(args):
+    """이전 send_text 방식: 매 메시지마다 reset_input_buffer + write + flush + 50ms 대기"""
+    count = min(args.messages, args.slow_messages)
+    recorder = LatencyRecorder()
+    with VirtualMicrobit(baudrate=args.baudrate, jitter=args.jitter,
+                         on_command=recorder.on_command) as device:
+        connection = serial.Serial(device.port, baudrate=115200, timeout=1.0)
+        with Measurement() as m:
+            for i in range(count):
+                connection.reset_input_buffer()
+                recorder.sent(i)
+                connection.write(f"m{i}\r\n".encode("utf-8"))
+                connection.flush()
+                time.sleep(0.05)
+            wait_for(lambda: device.received >= count, args.timeout)
+        connection.close()
+    return m.result(count, recorder.latencies, delivered=device.received)
+
+
+def bench_send_text(args):
+    """microbit.send_text: 송신 큐에 넣고 백그라운드에서 일괄 전송 (장치가 모두 받을 때까지)"""
+    recorder = LatencyRecorder()
+    with VirtualMicrobit(baudrate=args.baudrate, jitter=args.jitter,
+                         on_command=recorder.on_command) as device:
+        microbit.connect(device.port, ready_timeout=0.2)
+        try:
+            with Measurement() as m:
+                for i in range(args.messages):
+                    recorder.sent(i)
+                    microbit.send_text(f"m{i}")
+                microbit._writer.flush(args.timeout)
+                wait_for(lambda: device.received >= args.messages, args.timeout)
+            return m.result(device.received, recorder.latencies, delivered=device.received)
+        finally:
+            microbit.disconnect()
+
+
+def bench_send_and_receive(args):
+    """microbit.send_and_receive: 동기식 요청/응답 (wait_time 고정 대기)"""
+    count = min(args.messages, args.slow_messages)
+    with VirtualMicrobit(baudrate=args.baudrate, jitter=args.jitter) as device:
+        microbit.connect(device.port, ready_timeout=0.2)
+        try:
+            latencies = []
+            with Measurement() as m:
+                for i in range(count):
+                    start = time.perf_counter()
+                    microbit.send_and_receive(f"m{i}", wait_time=args.wait_time)
+                    latencies.append(time.perf_counter() - start)
+            return m.result(count, latencies)
+        finally:
+            microbit.disconnect()
+
+
+def _bench_pool(args, binary):
+    with VirtualMicrobit(baudrate=args.baudrate, jitter=args.jitter, binary=binary) as virtual:
+        device = MicrobitDevice(virtual.port, ready_timeout=0.2,
+                                protocol="binary" if binary else "text",
+                                rtt_window=args.messages)
+        device.start()
+        if not wait_for(device.is_connected, 5.0):
+            raise RuntimeError(f"가상 장치 연결 실패: {device.last_error}")
+        try:
+            with Measurement() as m:
+                for i in range(args.messages):
+                    device.send(f"m{i}")
+                wait_for(lambda: device.writer.stats()["acked"] >= args.messages, args.timeout)
+            stats = device.writer.stats()
+            return m.result(stats["acked"], device.writer.rtts(),
+                            protocol="binary" if device.binary else "text",
+                            ack_timeouts=stats["ack_timeouts"])
+        finally:
+            device.stop()
+
+
+def bench_pool_text(args):
+    """MicrobitDevice 텍스트 모드: 'Received: ...' 줄을 ACK로 사용"""
+    return _bench_pool(args, binary=False)
+
+
+def bench_pool_binary(args):
+    """MicrobitDevice 바이너리 모드: 6바이트 ACK 프레임"""
+    return _bench_pool(args, binary=True)
+
+
+def _bench_receive(args, binary):
+    buffer = SensorRingBuffer(capacity=args.messages)
+    recorder = LatencyRecorder()
+    lock = threading.Lock()
+    counter = {"count": 0}
+
+    # 첫 값(x)이 메시지 순번
+    def on_line(port, line):
+        values = parse_line(line)
+        buffer.append(values, port, line)
+        recorder.received(int(values.get("x", -1)))
+        with lock:
+            counter["count"] += 1
+
+    def on_samples(port, values):
+        buffer.append_array(values, port)
+        recorder.received(int(values[0]))
+        with lock:
+            counter["count"] += 1
+
+    with VirtualMicrobit(baudrate=args.baudrate, binary=binary) as virtual:
+        device = MicrobitDevice(virtual.port, on_line=on_line, on_samples=on_samples,
+                                ready_timeout=0.2, protocol="binary" if binary else "text")
+        device.start()
+        if not wait_for(device.is_connected, 5.0):
+            raise RuntimeError(f"가상 장치 연결 실패: {device.last_error}")
+        try:
+            with Measurement() as m:
+                for i in range(args.messages):
+                    recorder.sent(i)
+                    if binary:
+                        virtual.send_samples((i, i * 0.5, -i))
+                    else:
+                        virtual.send_line(f"x:{i},y:{i * 0.5},z:{-i}")
+                wait_for(lambda: counter["count"] >= args.messages, args.timeout)
+            return m.result(counter["count"], recorder.latencies,
+                            protocol="binary" if device.binary else "text")
+        finally:
+            device.stop()
+
+
+def bench_receive_text(args):
+    """장치 -> 호스트 'key:value' 줄 수신 및 링 버퍼 저장"""
+    return _bench_receive(args, binary=False)
+
+
+def bench_receive_binary(args):
+    """장치 -> 호스트 float32 프레임 수신 및 링 버퍼 저장"""
+    return _bench_receive(args, binary=True)
+
+
+def bench_listener(args):
+    """microbit.start_text_listening: 이전 수신 경로 (응답을 모아 한 번에 콜백)"""
+    received = []
+    recorder = LatencyRecorder()
+
+    def on_text(text):
+        received.append(text)
+        for sequence in re.findall(r"x:(\d+)", text):
+            recorder.received(int(sequence))
+
+    with VirtualMicrobit(baudrate=args.baudrate) as virtual:
+        microbit.connect(virtual.port, ready_timeout=0.2)
+        microbit.start_text_listening(on_text)
+        try:
+            with Measurement() as m:
+                for i in range(args.messages):
+                    recorder.sent(i)
+                    virtual.send_line(f"x:{i}")
+                wait_for(lambda: sum(text.count("x:") for text in received) >= args.messages,
+                         args.timeout)
+            count = sum(text.count("x:") for text in received)
+            return m.result(count, recorder.latencies, callbacks=len(received))
+        finally:
+            microbit.disconnect()
+
+
+SCENARIOS = {
+    "legacy_send": bench_legacy_send,
+    "send_text": bench_send_text,
+    "send_and_receive": bench_send_and_receive,
+    "pool_text": bench_pool_text,
+    "pool_binary": bench_pool_binary,
+    "receive_text": bench_receive_text,
+    "receive_binary": bench_receive_binary,
+    "listener": bench_listener,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--messages", type=int, default=500)
+    parser.add_argument("--slow-messages", type=int, default=50,
+                        help="고정 대기가 있는 경로(legacy_send, send_and_receive)의 메시지 수")
+    parser.add_argument("--baudrate", type=int, default=115200,
+                        help="가상 장치의 전송 속도 제한 (0이면 제한 없음)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--wait-time", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--scenario", nargs="+", choices=sorted(SCENARIOS),
+                        default=list(SCENARIOS))
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args(argv)
+
+    def number(value, width, digits):
+        """값이 없으면(측정하지 않음) 0 대신 n/a"""
+        return f"{value:{width}.{digits}f}" if value is not None else f"{'n/a':>{width}}"
+
+    results = {}
+    for name in args.scenario:
+        results[name] = SCENARIOS[name](args)
+        if not args.json:
+            result = results[name]
+            print(f"{name:18s} {result['messages']:6d} msgs  "
+                  f"{number(result['messages_per_sec'], 10, 1)} msg/s  "
+                  f"p50 {number(result['latency_p50_ms'], 8, 2)} ms  "
+                  f"p99 {number(result['latency_p99_ms'], 8, 2)} ms  "
+                  f"cpu {number(result['cpu_ms_per_message'], 7, 3)} ms/msg")
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
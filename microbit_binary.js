@@ -0,0 +1,65 @@
+// Binary framing example (see orangecontrib/orange3example/utils/framing.py)
+// frame: 0xA5 | type | length (UInt16LE) | payload | crc16 (UInt16LE, CCITT-FALSE over type..payload)
+const SYNC = 0xA5;
+const FRAME_TEXT = 0x01;
+const FRAME_FLOAT32 = 0x02;
+const FRAME_ACK = 0x06;
+
+let binaryMode = false;
+
+function crc16(buf: Buffer, crc: number): number {
+  for (let i = 0; i < buf.length; i++) {
+    crc ^= buf[i] << 8;
+    for (let bit = 0; bit < 8; bit++) {
+      crc = crc & 0x8000 ? ((crc << 1) ^ 0x1021) & 0xFFFF : (crc << 1) & 0xFFFF;
+    }
+  }
+  return crc;
+}
+
+function sendFrame(type: number, payload: Buffer) {
+  const frame = pins.createBuffer(6 + payload.length);
+  frame[0] = SYNC;
+  frame[1] = type;
+  frame.setNumber(NumberFormat.UInt16LE, 2, payload.length);
+  frame.write(4, payload);
+  const crc = crc16(frame.slice(1, 3 + payload.length), 0xFFFF);
+  frame.setNumber(NumberFormat.UInt16LE, 4 + payload.length, crc);
+  serial.writeBuffer(frame);
+}
+
+function binaryLoop() {
+  while (true) {
+    if (serial.readBuffer(1)[0] != SYNC) continue;
+    const header = serial.readBuffer(3);
+    const length = header.getNumber(NumberFormat.UInt16LE, 1);
+    const payload = length > 0 ? serial.readBuffer(length) : pins.createBuffer(0);
+    const crc = serial.readBuffer(2).getNumber(NumberFormat.UInt16LE, 0);
+    if (crc16(payload, crc16(header, 0xFFFF)) != crc) continue;
+    // Like microbit.js, only acknowledge: showString would block the ACK for seconds
+    if (header[0] == FRAME_TEXT) sendFrame(FRAME_ACK, pins.createBuffer(0));
+  }
+}
+
+serial.onDataReceived(serial.delimiters(Delimiters.NewLine), function () {
+  if (binaryMode) return;
+  const received = serial.readUntil(serial.delimiters(Delimiters.NewLine)).trim();
+  if (received == "@proto bin") {
+    serial.writeLine("@proto bin ok");
+    binaryMode = true;
+    control.inBackground(binaryLoop);
+  } else {
+    serial.writeLine(received);
+  }
+});
+
+// Stream accelerometer x, y, z as one packed float32 frame (18 bytes)
+basic.forever(function () {
+  if (!binaryMode) return;
+  const payload = pins.createBuffer(12);
+  payload.setNumber(NumberFormat.Float32LE, 0, input.acceleration(Dimension.X));
+  payload.setNumber(NumberFormat.Float32LE, 4, input.acceleration(Dimension.Y));
+  payload.setNumber(NumberFormat.Float32LE, 8, input.acceleration(Dimension.Z));
+  sendFrame(FRAME_FLOAT32, payload);
+  basic.pause(20);
+});
@@ -1,4 +1,4 @@
 # -*- coding: utf-8 -*-
 # in orangecontrib/__init__.py
-import pkg_resources
-pkg_resources.declare_namespace(__name__)
\ No newline at end of file
+# pkgutil-style namespace package (importing pkg_resources is slow at startup)
+__path__ = __import__("pkgutil").extend_path(__path__, __name__)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""LLM 변환을 GUI 없이 실행하는 명령행 도구
+
+    orange3example-llm reviews.csv out.csv --prompt "Summarize in one line." --column text
+    python -m orangecontrib.orange3example.cli data.tab out.tab --prompt-file prompt.txt
+
+.csv / .tab(.tsv) 파일을 한 행씩 읽고, 결과를 들어오는 대로 --chunk-size 행마다 기록함.
+"""
+import argparse
+import csv
+import os
+import sys
+
+from orangecontrib.orange3example.utils.llm import transform
+
+# Orange .tab 형식의 두 번째 헤더 줄(변수 타입)에 올 수 있는 값
+_TAB_TYPES = {"", "c", "continuous", "d", "discrete", "s", "string", "t", "time", "text",
+              "n", "numeric"}
+_STRING_TYPES = {"s", "string", "text"}
+# 세 번째 헤더 줄(flags)에 올 수 있는 값 (그 밖에 key=value 속성)
+_TAB_FLAGS = {"c", "class", "m", "meta", "i", "ignore", "w", "weight"}
+
+
+def _delimiter(path: str) -> str:
+    return "," if os.path.splitext(path)[1].lower() == ".csv" else "\t"
+
+
+def _is_type(value: str) -> bool:
+    """.tab 타입 줄의 값인지. 이산 변수는 'amphibian bird fish'처럼 값 목록으로 적힘"""
+    value = value.strip()
+    return value.lower() in _TAB_TYPES or " " in value
+
+
+def _is_flags(value: str) -> bool:
+    return all(token.lower() in _TAB_FLAGS or "=" in token for token in value.split())
+
+
+def _is_tab_header(types, flags) -> bool:
+    """Orange .tab의 두 번째/세 번째 헤더 줄인지 (flags 줄에 값이 있거나 타입 줄이 모두 타입 값)"""
+    if flags is None or not all(_is_flags(value) for value in flags):
+        return False
+    return any(value.strip() for value in flags) or all(_is_type(value) for value in types)
+
+
+def read_rows(path: str, columns=None):
+    """입력 파일의 행에서 텍스트를 하나씩 생성 (파일 전체를 메모리에 올리지 않음)
+
+    columns가 없으면 .tab의 string/text 변수, 그것도 없으면 첫 번째 열을 사용
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f, delimiter=_delimiter(path))
+        names = next(reader, [])
+        first = next(reader, None)
+        second = next(reader, None) if first is not None else None
+        types = None
+        if path.lower().endswith((".tab", ".tsv")) and first is not None \
+                and _is_tab_header(first, second):
+            types = [value.strip().lower() for value in first]
+            first = second = None
+
+        if columns:
+            missing = [name for name in columns if name not in names]
+            if missing:
+                raise ValueError(f"열을 찾을 수 없습니다: {', '.join(missing)}")
+            indices = [names.index(name) for name in columns]
+        elif types and any(t in _STRING_TYPES for t in types):
+            indices = [i for i, t in enumerate(types) if t in _STRING_TYPES]
+        else:
+            indices = [0]
+
+        def texts(row):
+            return " ".join(row[i] for i in indices if i < len(row) and row[i] not in ("", "?"))
+
+        for row in (first, second):
+            if row is not None:
+                yield texts(row)
+        for row in reader:
+            yield texts(row)
+
+
+def write_results(path: str, results, chunk_size: int = 100) -> int:
+    """(행 번호, 응답)을 받는 대로 기록. 기록한 행 수 반환"""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=_delimiter(path))
+        writer.writerow(["row", "Transformed Text"])
+        if _delimiter(path) == "\t":
+            writer.writerow(["continuous", "string"])
+            writer.writerow(["", "meta"])
+        buffer = []
+        for index, result in results:
+            buffer.append([index, result])
+            if len(buffer) >= chunk_size:
+                writer.writerows(buffer)
+                f.flush()
+                count += len(buffer)
+                buffer = []
+        writer.writerows(buffer)
+        count += len(buffer)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the LLM Transformer without the Orange GUI.")
+    parser.add_argument("input", help="입력 .csv / .tab 파일")
+    parser.add_argument("output", help="출력 .csv / .tab 파일")
+    prompt = parser.add_mutually_exclusive_group(required=True)
+    prompt.add_argument("--prompt")
+    prompt.add_argument("--prompt-file")
+    parser.add_argument("--column", action="append",
+                        help="변환할 열 이름 (여러 번 지정하면 공백으로 이어 붙임)")
+    parser.add_argument("--api-key", help="기본값: .env 또는 OPENAI_API_KEY")
+    parser.add_argument("--workers", type=int, default=4, help="동시 요청 수")
+    parser.add_argument("--max-input-tokens", type=int,
+                        help="요청 하나의 입력 토큰 예산 (기본: 모델 컨텍스트 - 출력 예약). "
+                             "넘는 행은 나눠서 요청한 뒤 합침")
+    parser.add_argument("--chunk-size", type=int, default=100, help="이 행 수마다 출력 파일에 기록")
+    parser.add_argument("--unordered", action="store_true",
+                        help="끝난 순서대로 기록 (행 번호는 row 열에 유지)")
+    args = parser.parse_args(argv)
+
+    if args.prompt_file:
+        with open(args.prompt_file, encoding="utf-8") as f:
+            prompt_text = f.read()
+    else:
+        prompt_text = args.prompt
+
+    results = transform(prompt_text, read_rows(args.input, args.column),
+                        api_key=args.api_key, max_workers=args.workers,
+                        ordered=not args.unordered, max_input_tokens=args.max_input_tokens)
+    count = write_results(args.output, results, args.chunk_size)
+    print(f"{count} rows written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
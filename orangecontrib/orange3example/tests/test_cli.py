@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import os
+import tempfile
+import unittest
+
+from Orange.data import Table
+
+from orangecontrib.orange3example.cli import read_rows
+
+
+class TestReadRows(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def save(self, table, name):
+        path = os.path.join(self.directory.name, name)
+        table.save(path)
+        return path
+
+    def test_orange_tab_with_discrete_class(self):
+        # 이산 변수의 타입 줄은 값 목록('amphibian bird fish ...')으로 저장됨
+        zoo = Table("zoo")
+        rows = list(read_rows(self.save(zoo, "zoo.tab")))
+        self.assertEqual(len(rows), len(zoo))
+        self.assertEqual(rows, [str(row["name"]) for row in zoo])
+
+    def test_orange_tab_selected_column(self):
+        zoo = Table("zoo")
+        rows = list(read_rows(self.save(zoo, "zoo.tab"), ["type"]))
+        self.assertEqual(rows, [str(row["type"]) for row in zoo])
+
+    def test_csv(self):
+        path = os.path.join(self.directory.name, "reviews.csv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("text,score\ngood,1\nbad,0\n")
+        self.assertEqual(list(read_rows(path)), ["good", "bad"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import struct
+import unittest
+
+from orangecontrib.orange3example.utils import framing
+
+
+def decode(decoder, data):
+    return [(frame_type, bytes(payload)) for frame_type, payload in decoder.feed(data)]
+
+
+class TestFraming(unittest.TestCase):
+    def test_round_trip(self):
+        data = (framing.encode_text("smile")
+                + framing.encode_frame(framing.FRAME_ACK)
+                + framing.encode_floats([1.5, -2.0])
+                + framing.encode_int16s([3, -4]))
+        frames = framing.FrameDecoder().feed(data)
+        self.assertEqual([frame_type for frame_type, _ in frames],
+                         [framing.FRAME_TEXT, framing.FRAME_ACK,
+                          framing.FRAME_FLOAT32, framing.FRAME_INT16])
+        self.assertEqual(bytes(frames[0][1]), b"smile")
+        self.assertEqual(bytes(frames[1][1]), b"")
+        self.assertEqual(list(framing.decode_values(*frames[2])), [1.5, -2.0])
+        self.assertEqual(list(framing.decode_values(*frames[3])), [3, -4])
+
+    def test_crc_matches_binascii(self):
+        # 펌웨어의 CRC-16/CCITT-FALSE 검사값
+        self.assertEqual(framing.crc16(b"123456789"), 0x29B1)
+
+    def test_corrupted_crc(self):
+        decoder = framing.FrameDecoder()
+        bad = bytearray(framing.encode_text("frown"))
+        bad[5] ^= 0xFF
+        frames = decode(decoder, bytes(bad) + framing.encode_text("smile"))
+        self.assertEqual(frames, [(framing.FRAME_TEXT, b"smile")])
+        self.assertGreaterEqual(decoder.crc_errors, 1)
+
+    def test_false_sync_then_frames(self):
+        decoder = framing.FrameDecoder()
+        # 길이가 MAX_PAYLOAD를 넘는 가짜 헤더는 바로 건너뜀
+        garbage = b"\x00" + bytes([framing.SYNC, framing.FRAME_TEXT]) + struct.pack(
+            "<H", framing.MAX_PAYLOAD + 1)
+        data = garbage + framing.encode_text("a") + framing.encode_text("b")
+        self.assertEqual(decode(decoder, data),
+                         [(framing.FRAME_TEXT, b"a"), (framing.FRAME_TEXT, b"b")])
+        self.assertGreater(decoder.dropped_bytes, 0)
+
+    def test_false_sync_with_plausible_length(self):
+        decoder = framing.FrameDecoder()
+        # 그럴듯한 길이(0x01A5)의 가짜 헤더는 그만큼 데이터가 올 때까지 기다렸다가
+        # CRC 오류 후 다음 바이트부터 다시 동기화함
+        garbage = b"\xa5\x01\xa5\x01"
+        frames = decode(decoder, garbage + framing.encode_text("first"))
+        for i in range(100):
+            frames += decode(decoder, framing.encode_text(f"m{i}"))
+        self.assertEqual([payload for _, payload in frames],
+                         [b"first"] + [f"m{i}".encode() for i in range(100)])
+        self.assertGreaterEqual(decoder.crc_errors, 1)
+
+    def test_partial_feeds(self):
+        data = framing.encode_text("hello") + framing.encode_floats([1.0, 2.0, 3.0])
+        decoder = framing.FrameDecoder()
+        frames = []
+        for i in range(len(data)):
+            frames += decode(decoder, data[i:i + 1])
+        self.assertEqual(frames, [(framing.FRAME_TEXT, b"hello"),
+                                  (framing.FRAME_FLOAT32, struct.pack("<3f", 1.0, 2.0, 3.0))])
+        self.assertEqual(decoder.crc_errors, 0)
+        self.assertEqual(decoder.dropped_bytes, 0)
+
+    def test_payload_too_long(self):
+        with self.assertRaises(ValueError):
+            framing.encode_text("x" * (framing.MAX_PAYLOAD + 1))
+
+    def test_split_text_utf8_boundaries(self):
+        for text in ["a" * 2500, "가" * 1000, "ab가나" * 300, ""]:
+            parts = framing.split_text(text, 1024)
+            self.assertEqual("".join(parts), text)
+            self.assertTrue(all(0 < len(part.encode("utf-8")) <= 1024 for part in parts))
+        # 3바이트 문자가 경계에 걸리면 앞 조각을 줄임
+        self.assertEqual(framing.split_text("가나", 4), ["가", "나"])
+
+
+if __name__ == "__main__":
+    unittest.main()
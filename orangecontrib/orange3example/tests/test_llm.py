@@ -0,0 +1,44 @@
+import unittest
+
+from orangecontrib.orange3example.utils.llm import estimate_tokens, pack_texts, split_text
+
+
+class TestSplitText(unittest.TestCase):
+    def test_short_text_unchanged(self):
+        self.assertEqual(split_text("short text", 100), ["short text"])
+
+    def test_chunks_fit_and_rejoin(self):
+        text = "\n\n".join(
+            " ".join(f"Sentence {i}.{j} has a few words." for j in range(20)) for i in range(10))
+        chunks = split_text(text, 50)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), text)
+        self.assertTrue(all(estimate_tokens(chunk) <= 50 for chunk in chunks))
+
+    def test_text_without_separators(self):
+        text = "x" * 5000
+        chunks = split_text(text, 100)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), text)
+
+
+class TestPackTexts(unittest.TestCase):
+    def test_fits_unchanged(self):
+        texts = ["one", "two", "three"]
+        self.assertEqual(pack_texts(texts, 1000), texts)
+
+    def test_long_texts_share_budget(self):
+        short = "a short note"
+        long = " ".join(f"word{i}" for i in range(2000))
+        packed = pack_texts([short, long, long], 300)
+        self.assertEqual(packed[0], short)
+        self.assertTrue(packed[1].endswith(" …"))
+        self.assertEqual(packed[1], packed[2])
+        self.assertLessEqual(sum(estimate_tokens(text) for text in packed), 300)
+
+    def test_no_budget(self):
+        self.assertEqual(pack_texts(["some text", "more text"], 0), ["", ""])
+
+
+if __name__ == "__main__":
+    unittest.main()
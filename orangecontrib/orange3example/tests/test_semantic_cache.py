@@ -0,0 +1,52 @@
+import unittest
+
+from orangecontrib.orange3example.utils.semantic_cache import (
+    SemanticCache, numeric_tokens, similar_words, word_edit_distance)
+
+
+class TestSemanticCache(unittest.TestCase):
+    def test_numeric_tokens(self):
+        self.assertEqual(numeric_tokens("meeting at 9am costs 50 dollars"), ("9am", "50"))
+        self.assertEqual(numeric_tokens("no numbers here"), ())
+
+    def test_near_duplicate_hits(self):
+        cache = SemanticCache(threshold=0.9)
+        cache.add("The ticket costs 50 dollars", "A")
+        cache.add("Meeting at 9am tomorrow", "B")
+        self.assertEqual(cache.lookup("the  ticket costs 50 dollars!"), "A")
+        self.assertEqual(cache.lookup("The tickett costs 50 dollars"), "A")
+
+    def test_numbers_must_match(self):
+        cache = SemanticCache(threshold=0.9)
+        cache.add("The ticket costs 50 dollars", "A")
+        cache.add("Meeting at 9am tomorrow", "B")
+        self.assertIsNone(cache.lookup("The ticket costs 90 dollars"))
+        self.assertIsNone(cache.lookup("Meeting at 9pm tomorrow"))
+
+    def test_inserted_word_is_not_a_typo(self):
+        review = ("I stayed here for a week with my family and the staff were {} the whole time. "
+                  "The rooms were clean, breakfast was good and I would {}recommend this hotel.")
+        cache = SemanticCache(threshold=0.9)
+        cache.add(review.format("friendly", ""), "positive")
+        cache.add("Meeting at 9am tomorrow", "B")
+        self.assertIsNone(cache.lookup(review.format("friendly", "not ")))
+        self.assertIsNone(cache.lookup(review.format("unfriendly", "")))
+        self.assertEqual(cache.lookup(review.format("freindly", "")), "positive")
+
+    def test_word_edit_distance(self):
+        self.assertEqual(word_edit_distance("tickett", "ticket", 1), 1)
+        self.assertEqual(word_edit_distance("teh", "the", 1), 1)
+        self.assertEqual(word_edit_distance("friendly", "unfriendly", 1), 2)
+        self.assertTrue(similar_words("the tickett costs", "the ticket costs"))
+        self.assertFalse(similar_words("would recommend", "would not recommend"))
+
+    def test_replaced_entries_leave_index(self):
+        cache = SemanticCache(threshold=0.5, max_entries=3)
+        for i in range(10):
+            cache.add(f"row number {i}", i)
+        self.assertIsNone(cache.lookup("row number 2"))
+        self.assertEqual(cache.lookup("row numbr 9"), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
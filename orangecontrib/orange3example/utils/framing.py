@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""호스트 <-> 마이크로비트 바이너리 프레임 프로토콜
+
+프레임 구조 (모든 정수는 little-endian):
+
+    0xA5 | type(1) | length(2) | payload(length) | crc16(2)
+
+crc16은 type, length, payload에 대한 CRC-16/CCITT-FALSE(초기값 0xFFFF)이며
+binascii.crc_hqx와 같은 값. 펌웨어 예제는 smile_frown_binary.py / microbit_binary.js 참고.
+"""
+import binascii
+import struct
+import sys
+import time
+
+SYNC = 0xA5
+FRAME_TEXT = 0x01    # UTF-8 텍스트 (명령)
+FRAME_FLOAT32 = 0x02  # float32 배열 (센서 값)
+FRAME_INT16 = 0x03   # int16 배열 (센서 값)
+FRAME_ACK = 0x06     # 직전 TEXT 프레임 수신 확인 (payload 없음)
+
+MAX_PAYLOAD = 1024
+HANDSHAKE = "@proto bin"
+HANDSHAKE_OK = "@proto bin ok"
+
+_HEADER = struct.Struct("<BBH")
+_CRC = struct.Struct("<H")
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def crc16(data, value: int = 0xFFFF) -> int:
+    return binascii.crc_hqx(data, value)
+
+
+def encode_frame(frame_type: int, payload: bytes = b"") -> bytes:
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(f"payload가 너무 깁니다: {len(payload)} > {MAX_PAYLOAD}")
+    header = _HEADER.pack(SYNC, frame_type, len(payload))
+    crc = crc16(payload, crc16(header[1:]))
+    return header + payload + _CRC.pack(crc)
+
+
+def encode_text(text: str) -> bytes:
+    return encode_frame(FRAME_TEXT, text.encode("utf-8"))
+
+
+def split_text(text: str, limit: int = MAX_PAYLOAD) -> list:
+    """UTF-8로 limit 바이트를 넘지 않도록 텍스트를 나눔 (문자 중간에서 자르지 않음)"""
+    data = text.encode("utf-8")
+    parts = []
+    start = 0
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # UTF-8 연속 바이트(10xxxxxx)에서 끊기지 않도록 문자 시작 위치까지 되돌림
+        while end < len(data) and end > start and data[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start = end
+    return parts
+
+
+def encode_floats(values) -> bytes:
+    values = list(values)
+    return encode_frame(FRAME_FLOAT32, struct.pack(f"<{len(values)}f", *values))
+
+
+def encode_int16s(values) -> bytes:
+    values = list(values)
+    return encode_frame(FRAME_INT16, struct.pack(f"<{len(values)}h", *values))
+
+
+def decode_values(frame_type: int, payload: memoryview):
+    """FLOAT32/INT16 payload를 복사 없이 숫자 memoryview로 변환"""
+    fmt = "f" if frame_type == FRAME_FLOAT32 else "h"
+    usable = len(payload) - len(payload) % struct.calcsize(fmt)
+    if _LITTLE_ENDIAN:
+        return payload[:usable].cast("B").cast(fmt)
+    return struct.unpack(f"<{usable // struct.calcsize(fmt)}{fmt}", payload[:usable])
+
+
+class FrameDecoder:
+    """수신 바이트 스트림에서 프레임을 분리
+
+    feed()가 반환하는 payload는 내부 bytes 객체에 대한 memoryview이므로
+    프레임마다 복사가 일어나지 않음. 잘린 프레임의 나머지만 다음 feed까지 보관함
+    """
+
+    def __init__(self):
+        self._pending = b""
+        self.frames = 0
+        self.crc_errors = 0
+        self.dropped_bytes = 0
+
+    def feed(self, data: bytes) -> list:
+        """(type, payload memoryview) 목록 반환"""
+        buffer = self._pending + data if self._pending else bytes(data)
+        view = memoryview(buffer)
+        size = len(buffer)
+        frames = []
+        pos = 0
+        while True:
+            start = buffer.find(SYNC, pos)
+            if start < 0:
+                self.dropped_bytes += size - pos
+                pos = size
+                break
+            self.dropped_bytes += start - pos
+            if size - start < _HEADER.size:
+                pos = start
+                break
+            _, frame_type, length = _HEADER.unpack_from(buffer, start)
+            if length > MAX_PAYLOAD:
+                self.dropped_bytes += 1
+                pos = start + 1
+                continue
+            body_end = start + _HEADER.size + length
+            end = body_end + _CRC.size
+            if end > size:
+                pos = start
+                break
+            if crc16(view[start + 1:body_end]) != _CRC.unpack_from(buffer, body_end)[0]:
+                self.crc_errors += 1
+                self.dropped_bytes += 1
+                pos = start + 1
+                continue
+            frames.append((frame_type, view[start + _HEADER.size:body_end]))
+            pos = end
+        self.frames += len(frames)
+        self._pending = buffer[pos:]
+        return frames
+
+
+def negotiate(connection, timeout: float = 0.5) -> bool:
+    """펌웨어가 바이너리 모드를 지원하는지 확인
+
+    텍스트 줄로 HANDSHAKE를 보내고 HANDSHAKE_OK가 돌아오면 True.
+    기존 텍스트 펌웨어는 'Received: ...' 또는 에코로 응답하므로 False (텍스트 모드 유지)
+    """
+    connection.write((HANDSHAKE + "\r\n").encode("utf-8"))
+    connection.flush()
+    deadline = time.time() + timeout
+    pending = b""
+    while time.time() < deadline:
+        pending += connection.read(max(1, connection.in_waiting))
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            text = line.decode("utf-8", errors="ignore").strip()
+            if text == HANDSHAKE_OK:
+                return True
+            if HANDSHAKE in text:
+                return False  # 텍스트 펌웨어의 에코/응답
+    return False
@@ -1,46 +1,321 @@
 # -*- coding: utf-8 -*-
 import os
-from typing import Optional
-from openai import OpenAI
-from dotenv import load_dotenv
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from orangecontrib.orange3example.utils import tracing
+
+TEXT_MODEL = "gpt-4o-mini"
+MULTIMODAL_MODEL = "gpt-4o"
+MULTIMODAL_ERROR_PREFIX = "멀티모달 처리 오류"
+
+# 요청 하나의 입력(프롬프트 + 데이터) 토큰 예산 = 모델 컨텍스트 - 출력 예약.
+# 넘는 행은 나눠서 보낸 뒤 합침
+CONTEXT_TOKENS = {"gpt-4o": 128000, "gpt-4o-mini": 128000}
+DEFAULT_CONTEXT_TOKENS = 16000  # 목록에 없는 모델
+OUTPUT_RESERVE_TOKENS = 4096
+IMAGE_TOKENS = 85          # detail="low" 이미지 한 장의 토큰 수
+MESSAGE_OVERHEAD_TOKENS = 16
+# 프롬프트를 빼고 남은 데이터 예산이 이 비율보다 작으면 나누지 않고 오류로 처리
+# (조각이 너무 작아져서 유료 요청 수가 폭증하는 것을 막음)
+MIN_DATA_BUDGET_RATIO = 0.25
+MAX_CHUNKS_PER_ROW = 32
+PROMPT_TOO_LONG_ERROR = "Error: prompt exceeds token budget"
+MERGE_PROMPT = (
+    "{prompt}\n\n"
+    "The input was too long and was processed in {count} parts. "
+    "The user message contains the result for each part in order. "
+    "Combine them into a single answer to the instruction above."
+)
+
+_tiktoken = None
+_encodings = {}  # 모델 -> tiktoken 인코딩 (사용할 수 없으면 None)
+_ASCII = re.compile(r"[\x00-\x7f]")
+# 문단 / 줄 / 문장 / 단어 경계 (폭이 0인 패턴이라 나눈 조각을 이으면 원문과 같음)
+_SEPARATORS = [re.compile(r"(?<=\n\n)(?=[^\n])"), re.compile(r"(?<=\n)(?=[^\n])"),
+               re.compile(r"(?<=[.!?。])(?=\s)"), re.compile(r"(?<=\s)(?=\S)")]
+
+
+def max_input_tokens(model: str) -> int:
+    """모델의 기본 입력 토큰 예산 (컨텍스트 크기 - 출력 예약)"""
+    return CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS) - OUTPUT_RESERVE_TOKENS
+
+
+def _encoding(model: str):
+    """tiktoken 인코딩. 설치되어 있지 않거나 로드할 수 없으면 None (추정치 사용)"""
+    global _tiktoken
+    if model not in _encodings:
+        try:
+            if _tiktoken is None:
+                import tiktoken as _imported_tiktoken  # type: ignore
+                _tiktoken = _imported_tiktoken
+            try:
+                _encodings[model] = _tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = _tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _encodings[model] = None
+    return _encodings[model]
+
+
+def estimate_tokens(text: str, model: str = TEXT_MODEL) -> int:
+    """text의 토큰 수. tiktoken이 없으면 ASCII 4자당 1토큰, 그 외 문자는 1자당 1토큰으로 추정"""
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    ascii_chars = len(_ASCII.findall(text))
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _hard_split(text: str, max_tokens: int, model: str) -> List[str]:
+    """구분자가 없는 긴 조각을 글자 수 비율로 자름"""
+    tokens = estimate_tokens(text, model)
+    size = max(1, len(text) * max_tokens // max(tokens, 1))
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+
+def split_text(text: str, max_tokens: int, model: str = TEXT_MODEL, _level: int = 0) -> List[str]:
+    """text를 각각 max_tokens 이하인 조각으로 나눔
+
+    문단 > 줄 > 문장 > 단어 경계 순서로 자르고, 이웃한 조각은 예산 안에서 다시 합침
+    """
+    max_tokens = max(1, max_tokens)
+    if estimate_tokens(text, model) <= max_tokens:
+        return [text]
+    if _level >= len(_SEPARATORS):
+        return _hard_split(text, max_tokens, model)
+
+    pieces = []
+    for part in _SEPARATORS[_level].split(text):
+        if estimate_tokens(part, model) > max_tokens:
+            pieces.extend(split_text(part, max_tokens, model, _level + 1))
+        elif part:
+            pieces.append(part)
+
+    chunks, current, current_tokens = [], "", 0
+    for piece in pieces:
+        piece_tokens = estimate_tokens(piece, model)
+        if current and current_tokens + piece_tokens > max_tokens:
+            chunks.append(current)
+            current, current_tokens = "", 0
+        current += piece
+        current_tokens += piece_tokens
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pack_texts(texts: List[str], max_tokens: int, model: str = TEXT_MODEL) -> List[str]:
+    """여러 텍스트가 합쳐서 max_tokens 안에 들어가도록 긴 것부터 잘라냄
+
+    짧은 텍스트는 그대로 두고, 남은 예산을 긴 텍스트들에 똑같이 나눠 줌 (max-min 공정 배분).
+    잘린 텍스트 끝에는 ' …'를 붙이고, 예산이 전혀 남지 않은 텍스트는 빈 문자열로 반환
+    """
+    sizes = [estimate_tokens(text, model) for text in texts]
+    if sum(sizes) <= max_tokens:
+        return list(texts)
+
+    remaining = max(0, max_tokens)
+    order = sorted(range(len(texts)), key=lambda index: sizes[index])
+    shares = [0] * len(texts)
+    for position, index in enumerate(order):
+        share = remaining // (len(order) - position)
+        shares[index] = min(sizes[index], share)
+        remaining -= shares[index]
+
+    packed = []
+    for text, size, share in zip(texts, sizes, shares):
+        if share >= size:
+            packed.append(text)
+        elif share > 2:
+            packed.append(split_text(text, share - 2, model)[0].rstrip() + " …")
+        else:
+            packed.append("")
+    return packed
+
+
+def table_texts(table) -> Iterator[str]:
+    """Orange Table의 문자열 메타 변수를 행마다 공백으로 이어 붙여 반환 (LLM Transformer와 동일)"""
+    from Orange.data import StringVariable
+
+    string_meta_indices = [
+        idx for idx, var in enumerate(table.domain.metas)
+        if isinstance(var, StringVariable)
+    ]
+    for row in table:
+        yield " ".join(str(row.metas[idx]) for idx in string_meta_indices)
+
 
 class LLM:
     """GPT API를 호출하는 클래스"""
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_input_tokens: Optional[int] = None):
+        # openai / python-dotenv는 처음 사용할 때 import (Orange 시작 시간 단축)
+        from openai import OpenAI
+        from dotenv import load_dotenv
+
         # 우선순위: 위젯 입력 키 > .env > 환경변수
         load_dotenv()
         effective_key = api_key or os.getenv("OPENAI_API_KEY")
         self.openai_client = OpenAI(api_key=effective_key)
+        self.model = TEXT_MODEL
+        self.multimodal_model = MULTIMODAL_MODEL
+        self.max_input_tokens = max_input_tokens  # None이면 모델별 기본값
+        self.chunk_workers = 4
 
-    def get_response(self, prompt, data_list):
-        """GPT의 응답을 받아서 그대로 반환"""
-        results = []
-
-        for data in data_list:
-            try:
+    def _request(self, prompt, text) -> str:
+        try:
+            with tracing.span("llm.request", "network", model=self.model):
                 response = self.openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
+                    model=self.model,
                     messages=[
                         {"role": "system", "content": prompt},
-                        {"role": "user", "content": str(data)},
+                        {"role": "user", "content": text},
                     ],
                     temperature=0,
                 )
-                results.append(response.choices[0].message.content.strip())
+            return response.choices[0].message.content.strip()
+
+        except Exception as e:
+            return f"Error: {str(e)}"  # 오류 발생 시 메시지 반환
+
+    def input_limit(self, model: Optional[str] = None) -> int:
+        return self.max_input_tokens or max_input_tokens(model or self.model)
+
+    def data_budget(self, prompt, model: Optional[str] = None) -> int:
+        """프롬프트를 빼고 데이터에 쓸 수 있는 토큰 수 (0 이하일 수 있음)"""
+        used = estimate_tokens(prompt, model or self.model) + MESSAGE_OVERHEAD_TOKENS
+        return self.input_limit(model) - used
 
-            except Exception as e:
-                results.append(f"Error: {str(e)}")  # 오류 발생 시 메시지 추가
+    def has_data_budget(self, budget: int, model: Optional[str] = None) -> bool:
+        return budget >= MIN_DATA_BUDGET_RATIO * self.input_limit(model)
 
-        return results
+    def complete(self, prompt, data, _depth: int = 0) -> str:
+        """한 행에 대한 GPT 응답 반환. 실패하면 'Error: ...' 문자열
+
+        행이 토큰 예산을 넘으면 조각으로 나눠 동시에 요청(map)하고, 조각별 응답을
+        한 번 더 요청해서 합침(reduce). 합칠 응답도 예산을 넘으면 같은 방식을 반복
+        """
+        text = str(data)
+        budget = self.data_budget(prompt)
+        if not self.has_data_budget(budget):
+            return PROMPT_TOO_LONG_ERROR
+        with tracing.span("llm.plan", "cpu") as span:
+            chunks = split_text(text, budget, self.model)
+            span.set(chunks=len(chunks))
+        if len(chunks) == 1:
+            return self._request(prompt, text)
+        if _depth >= 3:  # 합친 응답이 계속 예산을 넘으면 앞부분만 사용
+            return self._request(prompt, chunks[0])
+        if len(chunks) > MAX_CHUNKS_PER_ROW:
+            return (f"Error: row exceeds token budget "
+                    f"({len(chunks)} chunks, limit {MAX_CHUNKS_PER_ROW})")
+        # 조각별 요청을 보내기 전에 합치는 요청도 예산 안에 들어가는지 확인
+        merge_prompt = MERGE_PROMPT.format(prompt=prompt, count=len(chunks))
+        if not self.has_data_budget(self.data_budget(merge_prompt)):
+            return PROMPT_TOO_LONG_ERROR
+
+        with ThreadPoolExecutor(max_workers=min(self.chunk_workers, len(chunks))) as executor:
+            partials = list(executor.map(lambda chunk: self._request(prompt, chunk), chunks))
+        errors = [partial for partial in partials if partial.startswith("Error:")]
+        if errors:
+            return errors[0]
+        merged_input = "\n\n".join(f"[Part {number}]\n{partial}"
+                                     for number, partial in enumerate(partials, 1))
+        return self.complete(merge_prompt, merged_input, _depth + 1)
+
+    def iter_responses(self, prompt, data_iter: Iterable, max_workers: int = 4,
+                       max_pending: Optional[int] = None, ordered: bool = True,
+                       on_complete: Optional[Callable] = None) -> Iterator[Tuple[int, str]]:
+        """(행 번호, 응답)을 생성하는 제너레이터
+
+        입력은 필요한 만큼만 읽고, 동시에 진행 중인(또는 순서를 기다리는) 요청은
+        최대 max_pending개(기본 2 * max_workers)로 제한하므로 입력 크기와 관계없이
+        메모리 사용량이 일정함. ordered=False이면 끝난 순서대로 반환.
+        on_complete(행 번호, 입력, 응답, 시작 시각, 종료 시각)는 각 행이 끝나는 즉시
+        작업 스레드에서 호출됨 (결과 저장 등)
+        """
+        max_pending = max_pending or 2 * max_workers
+        rows = enumerate(data_iter)
+
+        def run(index, data):
+            started = time.time()
+            result = self.complete(prompt, data)
+            on_complete(index, data, result, started, time.time())
+            return result
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()  # (index, future), 제출 순서
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        index, data = next(rows)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if on_complete is None:
+                        future = executor.submit(self.complete, prompt, data)
+                    else:
+                        future = executor.submit(run, index, data)
+                    pending.append((index, future))
+                if not pending:
+                    return
 
-    def get_multimodal_response(self, prompt, multimodal_data):
-        """멀티모달 데이터(이미지+텍스트)를 처리하는 메서드"""
+                if ordered:
+                    index, future = pending.popleft()
+                    yield index, future.result()
+                else:
+                    done, _ = wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                    for item in [item for item in pending if item[1] in done]:
+                        pending.remove(item)
+                        yield item[0], item[1].result()
+
+    def get_response(self, prompt, data_list):
+        """GPT의 응답을 받아서 그대로 반환"""
+        return [result for _, result in self.iter_responses(prompt, data_list)]
+
+    def pack_multimodal(self, prompt, multimodal_data):
+        """이미지 토큰과 프롬프트를 뺀 예산에 맞게 텍스트 항목을 잘라냄
+
+        (잘라낸 데이터, 잘리거나 빠진 텍스트 항목 수) 반환.
+        프롬프트가 예산을 거의 다 쓰면 (None, 0)
+        """
+        images = sum(1 for item in multimodal_data if item["type"] == "image")
+        budget = self.data_budget(prompt, self.multimodal_model) - images * IMAGE_TOKENS
+        if not self.has_data_budget(budget, self.multimodal_model):
+            return None, 0
+        texts = [item["data"] for item in multimodal_data if item["type"] == "text"]
+        with tracing.span("llm.pack", "cpu", texts=len(texts)):
+            packed = pack_texts(texts, budget, self.multimodal_model)
+        truncated = sum(1 for before, after in zip(texts, packed) if before != after)
+        packed = iter(packed)
+        return [
+            item if item["type"] != "text" else dict(item, data=next(packed))
+            for item in multimodal_data
+        ], truncated
+
+    def get_multimodal_response(self, prompt, multimodal_data, packed: bool = False):
+        """멀티모달 데이터(이미지+텍스트)를 처리하는 메서드
+
+        packed=True이면 multimodal_data가 이미 pack_multimodal의 결과(예산을 넘으면 None)이므로
+        다시 토큰을 세지 않음
+        """
         try:
             # 멀티모달 메시지 구성
             messages = [{"role": "system", "content": prompt}]
             
             # 사용자 메시지 구성
             user_content = []
+
+            if not packed:
+                multimodal_data, _ = self.pack_multimodal(prompt, multimodal_data)
+            if multimodal_data is None:
+                return [f"{MULTIMODAL_ERROR_PREFIX}: prompt exceeds token budget"]
             
             for item in multimodal_data:
                 if item["type"] == "image":
@@ -52,7 +327,7 @@ class LLM:
                             "detail": "low"
                         }
                     })
-                elif item["type"] == "text":
+                elif item["type"] == "text" and item["data"]:
                     # 텍스트 데이터 추가
                     if user_content and user_content[-1].get("type") == "text":
                         # 이미 텍스트가 있으면 기존 텍스트에 추가
@@ -71,16 +346,32 @@ class LLM:
             })
             
             # GPT-4o 모델로 멀티모달 요청
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                temperature=0,
-                max_tokens=1000
-            )
+            with tracing.span("llm.multimodal_request", "network", model=self.multimodal_model):
+                response = self.openai_client.chat.completions.create(
+                    model=self.multimodal_model,
+                    messages=messages,
+                    temperature=0,
+                    max_tokens=1000
+                )
             
             return [response.choices[0].message.content.strip()]
             
         except Exception as e:
-            return [f"멀티모달 처리 오류: {str(e)}"]
+            return [f"{MULTIMODAL_ERROR_PREFIX}: {str(e)}"]
+
+
+def transform(prompt, data, api_key: Optional[str] = None, max_workers: int = 4,
+              max_pending: Optional[int] = None, ordered: bool = True,
+              max_input_tokens: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """GUI 없이 LLM 변환 실행
+
+    data: Orange.data.Table(문자열 메타 변수 사용) 또는 문자열 iterable.
+    (행 번호, 응답)을 스트리밍하는 제너레이터 반환. 예:
 
-    
\ No newline at end of file
+        for index, result in transform("Summarize.", Table("reviews.tab")):
+            ...
+    """
+    if hasattr(data, "domain"):
+        data = table_texts(data)
+    return LLM(api_key=api_key, max_input_tokens=max_input_tokens).iter_responses(
+        prompt, data, max_workers=max_workers, max_pending=max_pending, ordered=ordered)
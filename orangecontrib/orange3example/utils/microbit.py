@@ -1,33 +1,340 @@
 # -*- coding: utf-8 -*-
-import serial
 import time
-import serial.tools.list_ports
 import threading
+import queue
+import collections
 
+from orangecontrib.orange3example.utils import framing, tracing
+
+_serial = None
 _connection = None
+_writer = None
 _text_input_callback = None
 _is_listening = False
 
+ACK_PREFIX = "Received: "
+
+
+def _ensure_serial():
+    """pyserial은 처음 사용할 때 import (Orange 시작 시간 단축)"""
+    global _serial
+    if _serial is None:
+        try:
+            import serial as _imported_serial  # type: ignore
+            import serial.tools.list_ports  # noqa: F401
+            _serial = _imported_serial
+        except Exception as exc:
+            raise RuntimeError("pyserial이 설치되어 있지 않습니다. 'pip install pyserial'을 실행하세요.") from exc
+    return _serial
+
+
+class SerialWriter:
+    """백그라운드 송신 큐를 통해 메시지를 모아서 전송하는 시리얼 송신기
+
+    - 대기 중인 메시지를 max_batch개 / max_batch_bytes 바이트까지 한 번의 write로 묶어 전송
+    - interval: 연속된 write 사이의 최소 간격(초). max_batch=1이면 메시지 단위 간격이 됨
+    - track_acks: 펌웨어가 돌려주는 'Received: ...' 또는 에코 줄을 보낸 메시지의 ACK로 매칭
+    - encoder: 메시지를 바이트로 바꾸는 함수 (예: framing.encode_text). 없으면 텍스트 줄로 전송
+    - max_message_bytes: 메시지 하나의 최대 UTF-8 바이트 수 (예: framing.MAX_PAYLOAD).
+      더 긴 메시지는 여러 메시지로 나눠 전송. 0이면 제한 없음
+    """
+
+    def __init__(self, connection, interval: float = 0.0, max_batch: int = 32,
+                 max_batch_bytes: int = 64, track_acks: bool = False,
+                 ack_timeout: float = 2.0, terminator: str = "\r\n", max_queue: int = 0,
+                 encoder=None, rtt_window: int = 256, max_message_bytes: int = 0):
+        self._connection = connection
+        self.interval = interval
+        self.max_batch = max(1, max_batch)
+        self.max_batch_bytes = max(1, max_batch_bytes)
+        self.track_acks = track_acks
+        self.ack_timeout = ack_timeout
+        self.terminator = terminator
+        self.encoder = encoder
+        self.max_message_bytes = max_message_bytes
+        self.last_error = None
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._carry = None  # 바이트 한도 때문에 다음 배치로 미룬 메시지
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending_acks = collections.deque()  # (message, sent_time)
+        self._rtts = collections.deque(maxlen=rtt_window)
+        self._sent = 0
+        self._acked = 0
+        self._ack_timeouts = 0
+        self._rejected = 0  # 인코딩할 수 없어서 보내지 않은 메시지
+        self._first_write = None
+        self._last_write = None
+        self._next_write = 0.0
+
+    def encode(self, message: str) -> bytes:
+        """메시지를 전송용 바이트로 변환"""
+        if self.encoder is not None:
+            return self.encoder(message)
+        return (message + self.terminator).encode("utf-8")
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, flush: bool = True, timeout: float = 2.0):
+        """송신 스레드 종료. flush=True이면 남은 메시지를 먼저 전송"""
+        if flush:
+            self.flush(timeout)
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def send(self, text: str, block: bool = True, timeout: float = None) -> bool:
+        """텍스트를 송신 큐에 추가 (여러 줄이면 줄 단위 메시지로 분리)
+
+        max_message_bytes보다 긴 줄은 여러 메시지로 나눔. 인코딩에 실패한 메시지는
+        건너뛰고 last_error에 기록하며, 큐에 넣은 메시지가 하나도 없으면 False
+        """
+        if not self.is_running():
+            return False
+        queued = False
+        for line in str(text).splitlines():
+            message = line.strip()
+            if not message:
+                continue
+            if self.max_message_bytes and len(message.encode("utf-8")) > self.max_message_bytes:
+                messages = framing.split_text(message, self.max_message_bytes)
+            else:
+                messages = [message]
+            for message in messages:
+                try:
+                    encoded = self.encode(message)
+                except ValueError as e:
+                    with self._lock:
+                        self._rejected += 1
+                    self.last_error = f"메시지 인코딩 오류: {e}"
+                    continue
+                try:
+                    self._queue.put((message, encoded), block, timeout)
+                except queue.Full:
+                    return False
+                queued = True
+        return queued
+
+    def flush(self, timeout: float = None) -> bool:
+        """큐에 쌓인 메시지가 모두 전송될 때까지 대기"""
+        deadline = None if timeout is None else time.time() + timeout
+        while self._queue.unfinished_tasks > 0 and self.is_running():
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def wait_for_capacity(self, limit: int, timeout: float = None) -> bool:
+        """전송 대기 + ACK 대기 메시지 수가 limit 미만이 될 때까지 대기 (흐름 제어용)
+
+        ACK 추적을 하지 않으면 전송 대기 메시지 수만 확인. timeout이 지나면 False
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while self.is_running():
+            in_flight = self._queue.unfinished_tasks
+            if self.track_acks:
+                in_flight += len(self._pending_acks)
+            if in_flight < limit:
+                return True
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.002)
+        return False
+
+    def handle_line(self, line: str) -> bool:
+        """수신된 한 줄을 대기 중인 메시지의 ACK로 매칭. 매칭되면 True"""
+        if not self.track_acks:
+            return False
+        text = line.strip()
+        if text.startswith(ACK_PREFIX):
+            text = text[len(ACK_PREFIX):]
+        now = time.time()
+        with self._lock:
+            for index, (message, sent_time) in enumerate(self._pending_acks):
+                if text == message or text.startswith(message + " - "):
+                    del self._pending_acks[index]
+                    self._acked += 1
+                    self._rtts.append(now - sent_time)
+                    return True
+        return False
+
+    def handle_ack(self) -> bool:
+        """내용 없는 ACK(바이너리 ACK 프레임)를 가장 오래된 대기 메시지에 매칭"""
+        if not self.track_acks:
+            return False
+        now = time.time()
+        with self._lock:
+            if not self._pending_acks:
+                return False
+            _, sent_time = self._pending_acks.popleft()
+            self._acked += 1
+            self._rtts.append(now - sent_time)
+            return True
+
+    def rtts(self) -> list:
+        """최근 rtt_window개의 왕복 시간(초) 목록"""
+        with self._lock:
+            return list(self._rtts)
+
+    def stats(self) -> dict:
+        """전송량(messages/s)과 왕복 시간(RTT) 통계 반환"""
+        with self._lock:
+            elapsed = (self._last_write - self._first_write) if self._first_write else 0.0
+            rtts = list(self._rtts)
+            return {
+                "sent": self._sent,
+                "acked": self._acked,
+                "pending_acks": len(self._pending_acks),
+                "ack_timeouts": self._ack_timeouts,
+                "rejected": self._rejected,
+                "queued": self._queue.qsize(),
+                "messages_per_sec": self._sent / elapsed if elapsed > 0 else 0.0,
+                "rtt_avg": sum(rtts) / len(rtts) if rtts else None,
+                "rtt_last": rtts[-1] if rtts else None,
+            }
+
+    def _next_batch(self):
+        if self._carry is not None:
+            first, self._carry = self._carry, None
+        else:
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                return []
+        batch = [first]
+        size = len(first[1])
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if size + len(item[1]) > self.max_batch_bytes:
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item[1])
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._expire_acks()
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            wait = self._next_write - time.time()
+            if wait > 0:
+                time.sleep(wait)
+
+            # 빠른 응답이 write()가 끝나기 전에 도착해도 매칭되도록 ACK 대기 목록에 먼저 등록
+            entries = []
+            if self.track_acks:
+                started = time.time()
+                entries = [(message, started) for message, _ in batch]
+                with self._lock:
+                    self._pending_acks.extend(entries)
+            try:
+                with tracing.span("serial.write", "io", messages=len(batch)):
+                    self._connection.write(b"".join(payload for _, payload in batch))
+                    self._connection.flush()
+                now = time.time()
+                with self._lock:
+                    if self._first_write is None:
+                        self._first_write = now
+                    self._last_write = now
+                    self._sent += len(batch)
+            except Exception as e:
+                with self._lock:
+                    for entry in entries:
+                        try:
+                            self._pending_acks.remove(entry)
+                        except ValueError:
+                            pass
+                self.last_error = e
+                print(f"전송 오류: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            self._next_write = time.time() + self.interval
+
+        # 종료 시 남은 메시지는 버림
+        if self._carry is not None:
+            self._carry = None
+            self._queue.task_done()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._queue.task_done()
+
+    def _expire_acks(self):
+        if not self.track_acks:
+            return
+        limit = time.time() - self.ack_timeout
+        with self._lock:
+            while self._pending_acks and self._pending_acks[0][1] < limit:
+                self._pending_acks.popleft()
+                self._ack_timeouts += 1
+
 
 def list_ports() -> list:
     """사용 가능한 시리얼 포트 목록 반환"""
+    serial = _ensure_serial()
     return [port.device for port in serial.tools.list_ports.comports()]
 
 
-def connect(port: str, baudrate: int = 115200, timeout: float = 1.0) -> str:
+def wait_until_ready(connection, timeout: float = 2.0, quiet_time: float = 0.1) -> bool:
+    """연결 직후 들어오는 데이터가 quiet_time 동안 멈출 때까지 대기 (고정 2초 대기 대체)
+
+    timeout 안에 조용해지지 않으면 False 반환
+    """
+    start = last_activity = time.time()
+    while time.time() - start < timeout:
+        if connection.in_waiting > 0:
+            connection.reset_input_buffer()  # 부팅 메시지 등 이전 데이터 정리
+            last_activity = time.time()
+        elif time.time() - last_activity >= quiet_time:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def connect(port: str, baudrate: int = 115200, timeout: float = 1.0,
+            ready_timeout: float = 2.0, interval: float = 0.0,
+            track_acks: bool = False) -> str:
     """포트에 연결 시도. 성공 시 포트명 반환."""
-    global _connection
+    global _connection, _writer
+    if _writer:
+        _writer.stop(flush=False)
+        _writer = None
     if _connection:
         _connection.close()
-    _connection = serial.Serial(port, baudrate=baudrate, timeout=timeout)
-    time.sleep(2)  # 연결 안정화 대기
+    _connection = _ensure_serial().Serial(port, baudrate=baudrate, timeout=timeout)
+    wait_until_ready(_connection, ready_timeout)  # 연결 안정화 대기
+    _writer = SerialWriter(_connection, interval=interval, track_acks=track_acks)
+    _writer.start()
     return _connection.port
 
 
 def disconnect():
     """연결 해제"""
-    global _connection, _is_listening
+    global _connection, _writer, _is_listening
     _is_listening = False
+    if _writer:
+        _writer.stop(flush=True, timeout=1.0)
+        _writer = None
     if _connection and _connection.is_open:
         _connection.close()
         _connection = None
@@ -45,6 +352,8 @@ def send_and_receive(message: str, wait_time: float = 2.0) -> str:
     if not _connection or not _connection.is_open:
         raise RuntimeError("Microbit 연결이 되어 있지 않습니다. connect(port)를 먼저 호출하세요.")
 
+    if _writer:
+        _writer.flush(wait_time)  # 큐에 남은 메시지와 섞이지 않도록 먼저 전송
     _connection.reset_input_buffer()  # 🧹 이전 수신 버퍼 정리
     # CRLF로 전송 (마이크로비트/펌웨어에서 CRLF를 기대하는 경우 대응)
     _connection.write((message + '\r\n').encode('utf-8'))
@@ -62,24 +371,19 @@ def send_and_receive(message: str, wait_time: float = 2.0) -> str:
 
 
 def send_text(text: str) -> bool:
-    """텍스트를 마이크로비트로 즉시 전송"""
-    global _connection
-    if not _connection or not _connection.is_open:
+    """텍스트를 송신 큐에 넣고 즉시 반환 (백그라운드 스레드에서 일괄 전송)"""
+    global _connection, _writer
+    if not _connection or not _connection.is_open or not _writer:
         print("Microbit 연결이 되어 있지 않습니다.")
         return False
-    
-    try:
-        # 이전 수신 버퍼를 비우고, CRLF로 전송
-        _connection.reset_input_buffer()
-        message = text.strip() + '\r\n'
-        _connection.write(message.encode('utf-8'))
-        _connection.flush()  # 버퍼 즉시 전송
-        time.sleep(0.05)  # 전송 안정화 짧은 대기
-        print(f"전송됨: {text}")
-        return True
-    except Exception as e:
-        print(f"전송 오류: {str(e)}")
-        return False
+
+    # 수신 버퍼를 비우지 않으므로 아직 읽지 않은 응답이 보존됨
+    return _writer.send(text)
+
+
+def writer_stats() -> dict:
+    """현재 연결의 송신 통계(messages/s, RTT 등) 반환"""
+    return _writer.stats() if _writer else {}
 
 
 def start_text_listening(callback=None):
@@ -127,6 +431,10 @@ def start_text_listening(callback=None):
                     if response_parts:
                         # 모든 데이터를 합쳐서 하나의 응답으로 처리
                         full_response = "".join(response_parts).strip()
+                        if _writer:
+                            # 줄 단위로 ACK 매칭
+                            for line in full_response.splitlines():
+                                _writer.handle_line(line)
                         # 개행 문자 제거 및 정리
                         full_response = full_response.replace('\r', '').replace('\n', ' ')
                         # 여러 공백을 하나로 합치기
@@ -155,6 +463,7 @@ def stop_text_listening():
 def send_text_with_response(text: str, wait_time: float = 1.0) -> str:
     """텍스트 전송 후 응답 대기"""
     if send_text(text):
+        _writer.flush(wait_time)
         time.sleep(wait_time)
         if _connection and _connection.in_waiting > 0:
             try:
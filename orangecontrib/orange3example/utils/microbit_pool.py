@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+from orangecontrib.orange3example.utils import framing
+from orangecontrib.orange3example.utils.microbit import SerialWriter, wait_until_ready, _ensure_serial
+
+MAX_LINE_BYTES = 4096
+
+
+class MicrobitDevice:
+    """포트 하나에 대한 연결. 장치마다 독립된 수신/송신 스레드를 가짐
+
+    포트 열기, 읽기, 닫기는 모두 장치의 수신 스레드에서 수행되므로
+    호출하는 쪽(GUI 스레드)은 시리얼 I/O를 직접 다루지 않음
+
+    protocol: "text" (줄 단위), "binary" 또는 "auto" (framing.negotiate로 확인 후
+    지원하지 않으면 텍스트 모드로 동작)
+    """
+
+    def __init__(self, port: str, baudrate: int = 115200, on_line=None,
+                 on_samples=None, track_acks: bool = True, interval: float = 0.0,
+                 ready_timeout: float = 2.0, protocol: str = "text",
+                 rtt_window: int = 256):
+        self.port = port
+        self.baudrate = baudrate
+        self.on_line = on_line  # callback(port, line), 수신 스레드에서 호출됨
+        self.on_samples = on_samples  # callback(port, values), 바이너리 숫자 프레임
+        self.protocol = protocol
+        self.rtt_window = rtt_window
+        self.binary = False
+        self.track_acks = track_acks
+        self.interval = interval
+        self.ready_timeout = ready_timeout
+
+        self.status = "idle"  # idle / connecting / connected / error / closed
+        self.last_error = None
+        self.last_received = None
+        self.reconnects = 0
+        self.writer = None
+
+        self._connection = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """수신 스레드를 시작 (포트 열기는 스레드 안에서 수행)"""
+        if self.is_alive():
+            return
+        if self.status in ("error", "closed"):
+            self.reconnects += 1
+        self._stop_event.clear()
+        self.status = "connecting"
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """연결 종료 요청. 실제 포트 닫기는 수신 스레드에서 처리"""
+        self._stop_event.set()
+        self.status = "closed"
+
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_connected(self) -> bool:
+        return self.status == "connected" and self.writer is not None
+
+    def send(self, text: str) -> bool:
+        """송신 큐에 텍스트 추가 (블로킹 없음)"""
+        writer = self.writer
+        if not self.is_connected() or writer is None:
+            return False
+        return writer.send(text, block=False)
+
+    def wait_for_capacity(self, limit: int, timeout: float = None) -> bool:
+        """송신 큐와 ACK 대기 메시지가 limit 미만이 될 때까지 대기 (GUI 스레드에서 호출 금지)"""
+        writer = self.writer
+        return writer is not None and writer.wait_for_capacity(limit, timeout)
+
+    def info(self) -> dict:
+        writer = self.writer
+        return {
+            "status": self.status,
+            "last_error": str(self.last_error) if self.last_error else None,
+            "last_received": self.last_received,
+            "reconnects": self.reconnects,
+            "protocol": "binary" if self.binary else "text",
+            "stats": writer.stats() if writer else {},
+        }
+
+    def _open(self):
+        connection = _ensure_serial().Serial(self.port, baudrate=self.baudrate, timeout=0.1)
+        wait_until_ready(connection, self.ready_timeout)
+        self.binary = self.protocol in ("auto", "binary") and framing.negotiate(connection)
+        if self.protocol == "binary" and not self.binary:
+            print(f"{self.port}: 바이너리 프로토콜 미지원, 텍스트 모드로 전환")
+        writer = SerialWriter(connection, interval=self.interval, track_acks=self.track_acks,
+                              encoder=framing.encode_text if self.binary else None,
+                              max_message_bytes=framing.MAX_PAYLOAD if self.binary else 0,
+                              rtt_window=self.rtt_window)
+        writer.start()
+        self._connection = connection
+        self.writer = writer
+
+    def _close(self):
+        if self.writer is not None:
+            self.writer.stop(flush=False, timeout=0.5)
+            self.writer = None
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def _dispatch(self, raw: bytes):
+        line = raw.decode("utf-8", errors="ignore").strip()
+        if not line:
+            return
+        self.last_received = time.time()
+        # ACK로 소비된 줄은 센서 데이터가 아니므로 on_line으로 넘기지 않음
+        if self.writer is not None and self.writer.handle_line(line):
+            return
+        if self.on_line:
+            self.on_line(self.port, line)
+
+    def _dispatch_frame(self, frame_type: int, payload: memoryview):
+        self.last_received = time.time()
+        if frame_type == framing.FRAME_ACK:
+            if self.writer is not None:
+                self.writer.handle_ack()
+        elif frame_type == framing.FRAME_TEXT:
+            line = str(payload, "utf-8", errors="ignore").strip()
+            if line and self.on_line:
+                self.on_line(self.port, line)
+        elif frame_type in (framing.FRAME_FLOAT32, framing.FRAME_INT16):
+            if self.on_samples:
+                self.on_samples(self.port, framing.decode_values(frame_type, payload))
+
+    def _read_binary(self):
+        decoder = framing.FrameDecoder()
+        while not self._stop_event.is_set():
+            data = self._connection.read(max(1, self._connection.in_waiting))
+            if data:
+                for frame_type, payload in decoder.feed(data):
+                    self._dispatch_frame(frame_type, payload)
+
+    def _read_text(self):
+        buffer = bytearray()
+        while not self._stop_event.is_set():
+            # timeout(0.1초)까지 대기하므로 busy loop가 되지 않음
+            data = self._connection.read(max(1, self._connection.in_waiting))
+            if not data:
+                continue
+            buffer += data
+            if b"\n" in data:
+                *lines, rest = buffer.split(b"\n")
+                buffer = bytearray(rest)
+                for raw in lines:
+                    self._dispatch(raw)
+            elif len(buffer) > MAX_LINE_BYTES:
+                self._dispatch(bytes(buffer))
+                buffer.clear()
+
+    def _run(self):
+        try:
+            self._open()
+        except Exception as e:
+            self.last_error = e
+            self.status = "error"
+            self._close()
+            return
+
+        if not self._stop_event.is_set():
+            self.status = "connected"
+        try:
+            if self.binary:
+                self._read_binary()
+            else:
+                self._read_text()
+        except Exception as e:
+            self.last_error = e
+            if not self._stop_event.is_set():
+                self.status = "error"
+        finally:
+            self._close()
+
+
+class ConnectionPool:
+    """포트별 MicrobitDevice를 관리하는 연결 풀
+
+    - connect(port): 기존 연결을 끊지 않고 장치를 추가
+    - broadcast(text): 연결된 모든 장치로 전송
+    - send_routed(pairs): (포트 또는 장치 번호, 텍스트) 쌍을 장치별로 전송
+    - 상태 감시 스레드가 끊어진 장치를 지수 백오프로 자동 재연결
+    """
+
+    def __init__(self, on_line=None, on_samples=None, auto_reconnect: bool = True,
+                 health_interval: float = 1.0, max_backoff: float = 30.0,
+                 **device_options):
+        self.on_line = on_line
+        self.on_samples = on_samples
+        self.auto_reconnect = auto_reconnect
+        self.health_interval = health_interval
+        self.max_backoff = max_backoff
+        self.device_options = device_options
+
+        self._devices = {}
+        self._retry_at = {}  # port -> (다음 재연결 시각, 백오프)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._monitor = None
+
+    def connect(self, port: str) -> MicrobitDevice:
+        """장치를 풀에 추가하고 백그라운드에서 연결 시작"""
+        with self._lock:
+            device = self._devices.get(port)
+            if device is None:
+                device = MicrobitDevice(port, on_line=self.on_line, on_samples=self.on_samples,
+                                        **self.device_options)
+                self._devices[port] = device
+            self._retry_at.pop(port, None)
+        device.start()
+        self._ensure_monitor()
+        return device
+
+    def disconnect(self, port: str):
+        with self._lock:
+            device = self._devices.pop(port, None)
+            self._retry_at.pop(port, None)
+        if device is not None:
+            device.stop()
+
+    def close(self):
+        """모든 장치 연결 해제 및 감시 스레드 종료"""
+        self._stop_event.set()
+        for port in self.ports():
+            self.disconnect(port)
+
+    def ports(self) -> list:
+        with self._lock:
+            return sorted(self._devices)
+
+    def connected_ports(self) -> list:
+        with self._lock:
+            return sorted(port for port, device in self._devices.items()
+                          if device.is_connected())
+
+    def connected_devices(self) -> list:
+        with self._lock:
+            return [device for _, device in sorted(self._devices.items())
+                    if device.is_connected()]
+
+    def get(self, port: str):
+        with self._lock:
+            return self._devices.get(port)
+
+    def resolve(self, key):
+        """포트명 또는 장치 번호(정렬된 포트 목록의 인덱스)로 장치 조회"""
+        key = str(key).strip()
+        with self._lock:
+            device = self._devices.get(key)
+            if device is None:
+                try:
+                    index = int(float(key))
+                except (ValueError, OverflowError):
+                    return None
+                ports = sorted(self._devices)
+                if 0 <= index < len(ports):
+                    device = self._devices[ports[index]]
+        return device
+
+    def send(self, port: str, text: str) -> bool:
+        device = self.resolve(port)
+        return device is not None and device.send(text)
+
+    def broadcast(self, text: str) -> int:
+        """연결된 모든 장치로 전송. 전송 큐에 넣은 장치 수 반환"""
+        with self._lock:
+            devices = list(self._devices.values())
+        return sum(1 for device in devices if device.send(text))
+
+    def send_routed(self, pairs) -> dict:
+        """(라우팅 키, 텍스트) 쌍을 장치별로 모아 전송
+
+        반환값: {"sent": 전송 큐에 넣은 메시지 수, "unrouted": 장치를 찾지 못한 메시지 수}
+        """
+        grouped = {}
+        unrouted = 0
+        for key, text in pairs:
+            device = self.resolve(key)
+            if device is None:
+                unrouted += 1
+                continue
+            grouped.setdefault(device, []).append(text)
+
+        sent = 0
+        for device, texts in grouped.items():
+            if device.send("\n".join(texts)):
+                sent += len(texts)
+            else:
+                unrouted += len(texts)
+        return {"sent": sent, "unrouted": unrouted}
+
+    def status(self) -> dict:
+        """포트별 상태/통계 반환 (메모리 상태만 읽으므로 GUI 스레드에서 호출 가능)"""
+        with self._lock:
+            devices = dict(self._devices)
+        return {port: device.info() for port, device in devices.items()}
+
+    def _ensure_monitor(self):
+        if self._monitor is not None and self._monitor.is_alive():
+            return
+        self._stop_event.clear()
+        self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._monitor.start()
+
+    def _monitor_loop(self):
+        while not self._stop_event.wait(self.health_interval):
+            if not self.auto_reconnect:
+                continue
+            now = time.time()
+            with self._lock:
+                devices = list(self._devices.items())
+            for port, device in devices:
+                if device.is_alive() or device.status == "closed":
+                    self._retry_at.pop(port, None)
+                    continue
+                retry_at, backoff = self._retry_at.get(port, (now, self.health_interval))
+                if now < retry_at:
+                    continue
+                self._retry_at[port] = (now + backoff, min(backoff * 2, self.max_backoff))
+                device.start()
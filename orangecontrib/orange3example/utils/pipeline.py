@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""인코딩 / 요청 / 결과 조립을 겹쳐서 실행하는 asyncio 단계별 파이프라인 (Image LLM용)
+
+    pipeline = StagedPipeline(encode, request, assemble, max_in_flight=2)
+    pipeline.start()
+    pipeline.submit(job)          # GUI 스레드에서 호출, 바로 반환
+    for output in pipeline.poll():  # QTimer에서 주기적으로 호출
+        ...
+    pipeline.stop()
+
+- encode(job): CPU 작업 (PNG/base64 인코딩). 전용 스레드 하나에서 실행
+- request(job, encoded): 네트워크 요청. 최대 max_in_flight개가 동시에 진행
+- assemble(job, result, error): 출력 테이블 생성 등. 전용 스레드 하나에서 실행되고 결과는 poll()로 전달
+
+콜백에서 난 예외는 단계를 멈추지 않음: encode/request의 예외는 assemble의 error로,
+assemble의 예외는 예외 객체 그대로 poll() 결과로 전달됨.
+
+이벤트 루프는 백그라운드 스레드에서 돌고, 단계 사이 큐는 크기가 제한되어 있어서
+요청이 밀리면 인코딩이 멈추고(backpressure) 새 작업은 제출 큐에서 가장 오래된
+작업을 밀어냄(drop-oldest). 웹캠처럼 프레임이 계속 들어와도 최신 프레임만 처리됨.
+"""
+import asyncio
+import base64
+import collections
+import io
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from orangecontrib.orange3example.utils import tracing
+
+
+def encode_png_base64(image_array) -> str:
+    """numpy 이미지 배열을 PNG로 인코딩해서 base64 문자열로 반환"""
+    from PIL import Image  # imported on first use to keep canvas startup fast
+
+    with tracing.span("pipeline.encode_png", "cpu", shape=str(np.shape(image_array))):
+        pil_image = Image.fromarray(np.asarray(image_array).astype(np.uint8))
+        buffer = io.BytesIO()
+        pil_image.save(buffer, format="PNG")
+    with tracing.span("pipeline.encode_base64", "cpu", size=buffer.tell()):
+        return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+class StagedPipeline:
+    """encode -> request -> assemble 세 단계를 크기 제한 큐로 연결한 파이프라인"""
+
+    def __init__(self, encode, request, assemble, max_in_flight: int = 2,
+                 queue_size: int = 2, latest_only: bool = True):
+        self.encode = encode
+        self.request = request
+        self.assemble = assemble
+        self.max_in_flight = max(1, max_in_flight)
+        self.queue_size = max(1, queue_size)
+        # 더 최근 작업의 결과가 이미 나갔으면 늦게 끝난 이전 작업의 결과는 버림
+        self.latest_only = latest_only
+
+        self._outputs = queue.Queue()
+        self._loop = None
+        self._thread = None
+        self._sequence = itertools.count()
+        self._completed_times = collections.deque(maxlen=20)
+        self._timings = collections.defaultdict(lambda: collections.deque(maxlen=50))
+        self.submitted = 0
+        self.dropped = 0
+        self.stale = 0
+        self.completed = 0
+        self.in_flight = 0
+
+    def start(self):
+        if self.is_running():
+            return
+        self._cpu = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-encode")
+        self._io = ThreadPoolExecutor(max_workers=self.max_in_flight,
+                                      thread_name_prefix="pipeline-request")
+        # 인코딩과 따로 두어야 다음 프레임 인코딩과 결과 조립이 겹쳐서 실행됨
+        self._assembler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-assemble")
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+
+    def stop(self, timeout: float = 2.0):
+        """이벤트 루프 정지. 진행 중인 요청은 기다리지 않고 결과를 버림"""
+        if not self.is_running():
+            return
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+        self._cpu.shutdown(wait=False)
+        self._io.shutdown(wait=False)
+        self._assembler.shutdown(wait=False)
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def submit(self, job):
+        """작업 제출 (아무 스레드에서나 호출 가능). 제출 큐가 가득 차면 가장 오래된 작업을 버림"""
+        self.start()
+        item = (next(self._sequence), job, {"submitted": time.perf_counter()})
+        self._loop.call_soon_threadsafe(self._enqueue, item)
+
+    def poll(self) -> list:
+        """완료된 assemble 결과를 모두 꺼내서 반환 (GUI 스레드용)"""
+        outputs = []
+        while True:
+            try:
+                outputs.append(self._outputs.get_nowait())
+            except queue.Empty:
+                return outputs
+
+    def stats(self) -> dict:
+        times = list(self._completed_times)
+        elapsed = times[-1] - times[0] if len(times) > 1 else 0.0
+        return {
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "stale": self.stale,
+            "completed": self.completed,
+            "in_flight": self.in_flight,
+            "results_per_sec": (len(times) - 1) / elapsed if elapsed else 0.0,
+            **{f"{stage}_ms": 1000 * sum(values) / len(values)
+               for stage, values in self._timings.items() if values},
+        }
+
+    # 이벤트 루프 스레드
+
+    def _run(self, ready):
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main(ready))
+        finally:
+            self._loop.close()
+
+    async def _main(self, ready):
+        self._submitted = asyncio.Queue(self.queue_size)
+        self._encoded = asyncio.Queue(self.queue_size)
+        self._finished = asyncio.Queue(self.max_in_flight)
+        self._stopping = asyncio.Event()
+        self._last_sequence = -1
+        tasks = [asyncio.ensure_future(self._encode_stage()),
+                 asyncio.ensure_future(self._assemble_stage())]
+        tasks += [asyncio.ensure_future(self._request_stage()) for _ in range(self.max_in_flight)]
+        ready.set()
+        await self._stopping.wait()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _enqueue(self, item):
+        if self._submitted.full():
+            self._submitted.get_nowait()
+            self.dropped += 1
+        self._submitted.put_nowait(item)
+        self.submitted += 1
+
+    async def _encode_stage(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            sequence, job, times = await self._submitted.get()
+            start = time.perf_counter()
+            encoded, error = None, None
+            try:
+                encoded = await loop.run_in_executor(self._cpu, self.encode, job)
+            except Exception as e:
+                error = e
+            times["encode"] = time.perf_counter() - start
+            await self._encoded.put((sequence, job, times, encoded, error))
+
+    async def _request_stage(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            sequence, job, times, encoded, error = await self._encoded.get()
+            result = None
+            if error is None:
+                start = time.perf_counter()
+                self.in_flight += 1
+                try:
+                    result = await loop.run_in_executor(self._io, self.request, job, encoded)
+                except Exception as e:
+                    error = e
+                finally:
+                    self.in_flight -= 1
+                times["request"] = time.perf_counter() - start
+            await self._finished.put((sequence, job, times, result, error))
+
+    async def _assemble_stage(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            sequence, job, times, result, error = await self._finished.get()
+            if self.latest_only and sequence < self._last_sequence:
+                self.stale += 1
+                continue
+            self._last_sequence = sequence
+            start = time.perf_counter()
+            try:
+                output = await loop.run_in_executor(self._assembler, self.assemble, job, result, error)
+            except Exception as e:
+                output = e
+            times["assemble"] = time.perf_counter() - start
+            times["total"] = time.perf_counter() - times.pop("submitted")
+            for stage, seconds in times.items():
+                self._timings[stage].append(seconds)
+            self.completed += 1
+            self._completed_times.append(time.perf_counter())
+            self._outputs.put(output)
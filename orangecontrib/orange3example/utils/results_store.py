@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""완료된 LLM 응답을 행 단위로 즉시 기록하는 추가 전용(append-only) 결과 저장소 (SQLite WAL)
+
+    store = ResultsStore()                       # 기본: ~/.orange3example/results.sqlite
+    store.append(prompt, model, text, output, started, finished, run_id=run, row_index=i)
+    done = store.lookup(prompt, model, texts)    # {입력 해시: 응답}, 중단된 실행 이어 하기
+    for rows in store.iter_results(prompt, model, batch_size=1000):
+        ...                                      # fetchmany로 조금씩 읽음
+
+행은 수정/삭제하지 않고 추가만 하며, 한 행을 쓸 때마다 커밋하므로 위젯이나 Orange가
+비정상 종료되어도 그때까지 받은 응답은 남음. 같은 입력이 여러 번 기록되면 가장 최근 것을 사용.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".orange3example", "results.sqlite")
+LOOKUP_CHUNK = 500  # SQLite 매개변수 개수 제한보다 작게
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    prompt_hash TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    row_index INTEGER,
+    input_hash TEXT NOT NULL,
+    prompt_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    output TEXT NOT NULL,
+    started REAL,
+    finished REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS results_lookup ON results (prompt_hash, model, input_hash);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id, row_index);
+"""
+
+
+def input_hash(*parts) -> str:
+    """입력(텍스트, bytes, numpy 배열)의 SHA-256. 배열은 shape/dtype도 포함"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(f"{part.shape}{part.dtype}".encode())
+            part = np.ascontiguousarray(part).tobytes()
+        elif not isinstance(part, bytes):
+            part = str(part).encode("utf-8")
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+class ResultsStore:
+    """SQLite(WAL) 기반 추가 전용 결과 저장소. 여러 스레드에서 함께 사용해도 안전함"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or DEFAULT_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._known_prompts = set()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL: 기록 중에도 다른 위젯/프로세스가 읽을 수 있고, 커밋이 가벼움
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def append(self, prompt: str, model: str, data, output: str, started: float,
+               finished: Optional[float] = None, run_id: str = "", row_index: Optional[int] = None,
+               key: Optional[str] = None):
+        """완료된 행 하나를 기록하고 바로 커밋. key가 없으면 input_hash(data)"""
+        finished = finished if finished is not None else time.time()
+        digest = prompt_hash(prompt)
+        with self._lock:
+            if digest not in self._known_prompts:
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO prompts (prompt_hash, prompt) VALUES (?, ?)",
+                    (digest, prompt))
+                self._known_prompts.add(digest)
+            self._connection.execute(
+                "INSERT INTO results (run_id, row_index, input_hash, prompt_hash, model, output,"
+                " started, finished, duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, row_index, key or input_hash(data), digest, model, output,
+                 started, finished, finished - started))
+            self._connection.commit()
+
+    def lookup(self, prompt: str, model: str, data: Iterable = (),
+               keys: Optional[List[str]] = None) -> Dict[str, str]:
+        """이미 기록된 응답 {입력 해시: 응답}. data 대신 미리 계산한 keys를 줄 수 있음"""
+        keys = list(keys) if keys is not None else [input_hash(item) for item in data]
+        digest = prompt_hash(prompt)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_CHUNK):
+                chunk = keys[start:start + LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = self._connection.execute(
+                    "SELECT input_hash, output FROM results"
+                    f" WHERE prompt_hash = ? AND model = ? AND input_hash IN ({placeholders})"
+                    " ORDER BY id", [digest, model, *chunk])
+                found.update(cursor.fetchall())  # 같은 입력은 나중 행이 덮어씀
+        return found
+
+    def count(self, prompt: str, model: str) -> int:
+        """prompt/model에 대해 기록된 서로 다른 입력 수"""
+        with self._lock:
+            cursor = self._connection.execute(
+                "SELECT COUNT(DISTINCT input_hash) FROM results WHERE prompt_hash = ? AND model = ?",
+                (prompt_hash(prompt), model))
+            return cursor.fetchone()[0]
+
+    def iter_results(self, prompt: str, model: str,
+                     batch_size: int = 1000) -> Iterator[List[tuple]]:
+        """(입력 해시, 응답, 소요 시간) 행 목록을 batch_size개씩 생성 (입력별 최신 응답, 기록 순서)
+
+        결과 전체를 메모리에 올리지 않도록 별도 커서에서 fetchmany로 읽음
+        """
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute(
+                "SELECT input_hash, output, duration FROM results WHERE id IN ("
+                " SELECT MAX(id) FROM results WHERE prompt_hash = ? AND model = ?"
+                " GROUP BY input_hash) ORDER BY id",
+                (prompt_hash(prompt), model))
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield rows
+        finally:
+            cursor.close()
+
+
+def load_table(store: ResultsStore, prompt: str, model: str, column: str,
+               batch_size: int = 1000):
+    """기록된 응답 전체를 Orange Table(문자열 메타 변수 하나)로 읽음
+
+    행 수만큼 미리 할당한 배열을 batch_size개씩 채우므로 중간 목록을 만들지 않음
+    """
+    from Orange.data import Domain, StringVariable, Table
+
+    total = store.count(prompt, model)
+    metas = np.empty((total, 1), dtype=object)
+    filled = 0
+    for rows in store.iter_results(prompt, model, batch_size):
+        rows = rows[:total - filled]  # count 이후에 추가된 행은 무시
+        metas[filled:filled + len(rows), 0] = [output for _, output, _ in rows]
+        filled += len(rows)
+        if filled >= total:
+            break
+    domain = Domain([], metas=[StringVariable(column)])
+    return Table.from_numpy(domain, np.empty((filled, 0)), metas=metas[:filled])
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""공백/대소문자/문장부호/작은 오타만 다른 행의 LLM 응답을 재사용하는 로컬 캐시
+
+정규화한 텍스트를 문자 n-gram 해시 벡터(TF-IDF)로 색인하고, 코사인 유사도가
+threshold 이상인 이전 질의가 있으면 그 응답을 돌려줌. 네트워크 없이 NumPy만 사용.
+
+숫자가 들어간 토큰('50', '9am' 등)은 유사도와 상관없이 정확히 같아야 적중함.
+'50 dollars'와 '90 dollars'처럼 숫자 하나만 다른 행은 n-gram 유사도가 높아도 의미가 다르기 때문.
+같은 이유로 단어 수가 같고, 다른 단어끼리는 편집 거리가 max_word_edits 이하여야 적중함
+('would recommend' / 'would not recommend', 'friendly' / 'unfriendly'는 적중하지 않음).
+"""
+import re
+import threading
+import unicodedata
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+_NUMERIC_TOKEN = re.compile(r"\w*\d\w*")
+_HASH_MULTIPLIER = np.uint64(1000003)
+
+
+def normalize(text) -> str:
+    """유니코드 정규화(NFKC) + 소문자 + 문장부호 제거 + 공백 정리"""
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def numeric_tokens(text: str) -> tuple:
+    """정규화된 텍스트에서 숫자가 들어간 토큰 (순서대로)"""
+    return tuple(_NUMERIC_TOKEN.findall(text))
+
+
+def word_edit_distance(a: str, b: str, limit: int) -> int:
+    """두 단어의 편집 거리 (삽입/삭제/치환/인접 문자 교환). limit을 넘으면 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char_a != char_b))
+            if (before is not None and j > 1 and char_a == b[j - 2]
+                    and a[i - 2] == char_b):
+                current[j] = min(current[j], before[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def similar_words(a: str, b: str, max_edits: int = 1) -> bool:
+    """단어 수가 같고, 서로 다른 단어 쌍이 모두 max_edits 이하로만 다른지"""
+    words_a, words_b = a.split(), b.split()
+    return len(words_a) == len(words_b) and all(
+        word_a == word_b or word_edit_distance(word_a, word_b, max_edits) <= max_edits
+        for word_a, word_b in zip(words_a, words_b))
+
+
+def ngram_terms(text: str, n: int = 3, dim: int = 2048):
+    """정규화된 텍스트의 문자 n-gram을 dim개 버킷으로 해시. (버킷 번호, 개수) 희소 벡터 반환"""
+    if not text:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)
+    padded = " " * (n - 1) + text + " " * (n - 1)
+    codes = np.frombuffer(padded.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    hashes = np.zeros(len(codes) - n + 1, dtype=np.uint64)
+    for offset in range(n):
+        hashes = hashes * _HASH_MULTIPLIER + codes[offset:len(codes) - n + 1 + offset]
+    buckets, counts = np.unique((hashes % np.uint64(dim)).astype(np.intp), return_counts=True)
+    return buckets, counts.astype(np.float32)
+
+
+class SemanticCache:
+    """유사 중복 텍스트에 대한 응답 캐시
+
+    - 정규화한 텍스트가 완전히 같으면 바로 적중 (dict)
+    - 아니면 숫자 토큰이 같은 항목과의 TF-IDF 코사인 유사도를 한 번의 행렬 연산으로 계산
+      (질의의 n-gram 열만 모아서 곱하므로 항목 수 x 질의 길이 비용)
+    - threshold 이상인 후보 중 단어 단위로도 비슷한(similar_words) 가장 높은 항목을 사용
+    - 항목은 하나씩 추가(insert)되며, 추가 시점의 IDF로 가중/정규화한 행을 저장하고
+      항목 수가 두 배가 될 때마다 전체 행을 현재 IDF로 다시 가중함
+    - max_entries를 넘으면 가장 오래된 항목부터 교체
+    여러 스레드에서 함께 사용해도 안전함
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 2000,
+                 ngram: int = 3, dim: int = 2048, max_word_edits: int = 1):
+        self.threshold = threshold
+        self.max_word_edits = max_word_edits
+        self.max_entries = max(1, max_entries)
+        self.ngram = ngram
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._vectors = np.zeros((min(64, self.max_entries), self.dim), dtype=np.float32)
+        self._document_frequency = np.zeros(self.dim, dtype=np.float32)
+        self._terms = []     # 슬롯별 (버킷 번호, sublinear tf)
+        self._keys = []      # 슬롯별 정규화된 텍스트
+        self._answers = []   # 슬롯별 응답
+        self._exact = {}     # 정규화된 텍스트 -> 슬롯
+        self._by_numbers = {}  # 숫자 토큰 -> 슬롯 목록
+        self._next = 0
+        self._reweighted_size = 1
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _terms_for(self, key: str):
+        buckets, counts = ngram_terms(key, self.ngram, self.dim)
+        return buckets, 1 + np.log(counts)  # sublinear tf
+
+    def _weigh(self, terms) -> np.ndarray:
+        """idf 가중 후 단위 길이로 정규화한 값 (terms의 버킷 순서)"""
+        buckets, tf = terms
+        idf = np.log((1 + len(self._keys)) / (1 + self._document_frequency[buckets])) + 1
+        weighted = tf * idf
+        norm = np.linalg.norm(weighted)
+        return weighted / norm if norm else weighted
+
+    def _store(self, slot: int):
+        buckets = self._terms[slot][0]
+        self._vectors[slot] = 0
+        self._vectors[slot, buckets] = self._weigh(self._terms[slot])
+
+    def _best_match(self, key, terms, numbers):
+        """threshold 이상이면서 단어 단위로도 비슷한 가장 유사한 슬롯. 없으면 None"""
+        slots = self._by_numbers.get(numbers)
+        buckets = terms[0]
+        if not slots or not len(buckets):
+            return None
+        scores = self._vectors[np.ix_(slots, buckets)] @ self._weigh(terms)
+        candidates = np.flatnonzero(scores >= self.threshold)
+        for index in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            slot = slots[index]
+            if similar_words(key, self._keys[slot], self.max_word_edits):
+                return slot
+        return None
+
+    def lookup(self, text) -> Optional[str]:
+        """threshold 이상으로 비슷한 이전 질의의 응답. 없으면 None"""
+        key = normalize(text)
+        terms = self._terms_for(key)
+        numbers = numeric_tokens(key)
+        with self._lock:
+            slot = self._exact.get(key)
+            if slot is None:
+                slot = self._best_match(key, terms, numbers)
+            if slot is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return self._answers[slot]
+
+    def add(self, text, answer: str):
+        """질의/응답 추가. 가득 차면 가장 오래된 항목을 교체"""
+        key = normalize(text)
+        terms = self._terms_for(key)
+        numbers = numeric_tokens(key)
+        with self._lock:
+            if key in self._exact:
+                self._answers[self._exact[key]] = answer
+                return
+            slot = self._next
+            if slot < len(self._keys):  # 가장 오래된 항목 교체
+                self._document_frequency[self._terms[slot][0]] -= 1
+                del self._exact[self._keys[slot]]
+                old_numbers = numeric_tokens(self._keys[slot])
+                self._by_numbers[old_numbers].remove(slot)
+                if not self._by_numbers[old_numbers]:
+                    del self._by_numbers[old_numbers]
+                self._terms[slot] = terms
+                self._keys[slot] = key
+                self._answers[slot] = answer
+            else:
+                if slot == len(self._vectors):
+                    grown = np.zeros((min(2 * slot, self.max_entries), self.dim), dtype=np.float32)
+                    grown[:slot] = self._vectors
+                    self._vectors = grown
+                self._terms.append(terms)
+                self._keys.append(key)
+                self._answers.append(answer)
+            self._document_frequency[terms[0]] += 1
+            self._exact[key] = slot
+            self._by_numbers.setdefault(numbers, []).append(slot)
+            self._next = (slot + 1) % self.max_entries
+
+            if len(self._keys) >= 2 * self._reweighted_size:
+                self._reweighted_size = len(self._keys)
+                for index in range(len(self._keys)):
+                    self._store(index)
+            else:
+                self._store(slot)
+
+    def memory_bytes(self) -> int:
+        """색인 크기 (벡터 행렬 + 희소 항 + 키/응답 문자열)"""
+        terms = sum(buckets.nbytes + tf.nbytes for buckets, tf in self._terms)
+        strings = sum(len(key) for key in self._keys) + sum(len(str(a)) for a in self._answers)
+        return self._vectors.nbytes + self._document_frequency.nbytes + terms + strings
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+def cached_responses(cache: SemanticCache, texts: Sequence,
+                     respond: Callable[[List[str]], List[str]],
+                     is_cacheable: Callable[[str], bool] = lambda result: True) -> List[str]:
+    """texts에 대한 응답 목록. 캐시 적중 행과 같은 배치 안의 유사 중복 행은 respond를 호출하지 않음
+
+    respond(텍스트 목록)는 같은 길이의 응답 목록을 반환해야 함 (예: LLM.get_response).
+    is_cacheable이 False인 응답(오류 등)은 캐시에 넣지 않음
+    """
+    results = [None] * len(texts)
+    # 같은 배치 안에서 서로 비슷한 행은 대표 행 하나만 요청
+    batch = SemanticCache(cache.threshold, min(len(texts), cache.max_entries), cache.ngram, cache.dim,
+                          cache.max_word_edits)
+    representatives = []  # 요청할 행 번호
+    aliases = []          # (행 번호, 대표 순번)
+    for index, text in enumerate(texts):
+        answer = cache.lookup(text)
+        if answer is not None:
+            results[index] = answer
+            continue
+        position = batch.lookup(text)
+        if position is not None:
+            aliases.append((index, position))
+            continue
+        batch.add(text, len(representatives))
+        representatives.append(index)
+
+    answers = respond([texts[index] for index in representatives]) if representatives else []
+    for index, answer in zip(representatives, answers):
+        results[index] = answer
+        if is_cacheable(answer):
+            cache.add(texts[index], answer)
+    for index, position in aliases:
+        results[index] = answers[position]
+    # 같은 배치 안의 유사 중복도 요청을 아꼈으므로 적중으로 집계
+    with cache._lock:
+        cache.hits += len(aliases)
+        cache.misses -= len(aliases)
+    return results
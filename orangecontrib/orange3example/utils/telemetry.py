@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+import re
+import threading
+import time
+
+import numpy as np
+
+_KEY_VALUE = re.compile(
+    r"([A-Za-z_][\w.]*)\s*[:=]\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?![\w.])"
+)
+
+
+def parse_line(line: str) -> dict:
+    """수신된 한 줄에서 숫자 값을 추출
+
+    - 'temp:23.5,light:120' 또는 'x=1 y=2' 형식은 {이름: 값}
+    - '1,2,3' 같은 CSV 숫자 줄은 {'v0': 1.0, 'v1': 2.0, 'v2': 3.0}
+    - 숫자가 없는 줄은 빈 dict
+    """
+    pairs = _KEY_VALUE.findall(line)
+    if pairs:
+        return {key: float(value) for key, value in pairs}
+    tokens = [token for token in re.split(r"[,;\s]+", line.strip()) if token]
+    try:
+        return {f"v{i}": float(token) for i, token in enumerate(tokens)}
+    except ValueError:
+        return {}
+
+
+class SensorRingBuffer:
+    """최근 capacity개의 수신 줄을 보관하는 고정 크기 NumPy 링 버퍼
+
+    숫자 값은 (capacity, 열 개수) float 배열에 저장되고, 새 키가 나타나면 열이 추가됨.
+    수신 스레드에서 append하고 GUI 스레드에서 snapshot해도 안전함
+    """
+
+    def __init__(self, capacity: int = 1000, max_columns: int = 64):
+        self.capacity = max(1, capacity)
+        self.max_columns = max_columns
+        self.columns = []
+        self.version = 0  # append할 때마다 증가, 변경 여부 확인용
+        self._column_index = {}
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self._allocate()
+
+    def _allocate(self):
+        self._values = np.full((self.capacity, len(self.columns)), np.nan)
+        self._times = np.zeros(self.capacity)
+        self._sources = np.empty(self.capacity, dtype=object)
+        self._lines = np.empty(self.capacity, dtype=object)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        with self._lock:
+            self._allocate()
+            self.version += 1
+
+    def resize(self, capacity: int):
+        """용량 변경. 가장 최근 샘플부터 새 용량만큼 유지"""
+        with self._lock:
+            times, values, sources, lines = self._ordered()
+            self.capacity = max(1, capacity)
+            self._allocate()
+            keep = min(len(times), self.capacity)
+            if keep:
+                self._times[:keep] = times[-keep:]
+                self._values[:keep] = values[-keep:]
+                self._sources[:keep] = sources[-keep:]
+                self._lines[:keep] = lines[-keep:]
+            self._next = keep % self.capacity
+            self._count = keep
+            self.version += 1
+
+    def _ensure_columns(self, keys):
+        added = [key for key in keys if key not in self._column_index]
+        added = added[:self.max_columns - len(self.columns)]
+        if not added:
+            return
+        for key in added:
+            self._column_index[key] = len(self.columns)
+            self.columns.append(key)
+        self._values = np.hstack(
+            (self._values, np.full((self.capacity, len(added)), np.nan)))
+
+    def _write_row(self, indices, values, source, line, timestamp):
+        row = self._next
+        self._values[row] = np.nan
+        self._values[row, indices] = values
+        self._times[row] = (timestamp or time.time()) - self._start_time
+        self._sources[row] = source
+        self._lines[row] = line
+
+        self._next = (row + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+        self.version += 1
+
+    def append(self, values: dict, source: str = "", line: str = "", timestamp: float = None):
+        with self._lock:
+            self._ensure_columns(values)
+            known = [key for key in values if key in self._column_index]
+            self._write_row([self._column_index[key] for key in known],
+                            [values[key] for key in known], source, line, timestamp)
+
+    def append_array(self, values, source: str = "", timestamp: float = None):
+        """숫자 배열(바이너리 프레임)을 v0, v1, ... 열에 추가"""
+        values = np.asarray(values, dtype=float)
+        keys = [f"v{i}" for i in range(len(values))]
+        with self._lock:
+            self._ensure_columns(keys)
+            indices = [self._column_index[key] for key in keys if key in self._column_index]
+            self._write_row(indices, values[:len(indices)], source, "", timestamp)
+
+    def append_line(self, line: str, source: str = ""):
+        """한 줄을 파싱해서 추가"""
+        self.append(parse_line(line), source, line)
+
+    def _ordered(self):
+        if self._count < self.capacity:
+            order = slice(0, self._count)
+            return (self._times[order], self._values[order],
+                    self._sources[order], self._lines[order])
+        order = np.r_[self._next:self.capacity, 0:self._next]
+        return (self._times[order], self._values[order],
+                self._sources[order], self._lines[order])
+
+    def snapshot(self):
+        """(열 이름, 시간, 값, 장치, 원본 줄)을 오래된 순서로 복사해서 반환"""
+        with self._lock:
+            times, values, sources, lines = self._ordered()
+            return (list(self.columns), times.copy(), values.copy(),
+                    sources.copy(), lines.copy())
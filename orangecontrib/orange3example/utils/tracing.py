@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""가벼운 구간(span) 추적
+
+    from orangecontrib.orange3example.utils import tracing
+
+    with tracing.span("imagellm.encode_png", "cpu", width=640):
+        ...
+
+비활성화 상태(기본값)에서는 span()이 공유된 빈 컨텍스트 매니저를 돌려주므로 비용이 거의 없음.
+ORANGE3EXAMPLE_TRACE=1 환경변수 또는 enable()로 켜고, export_chrome_trace()로
+chrome://tracing / Perfetto에서 열 수 있는 JSON을 저장함.
+"""
+import collections
+import json
+import os
+import threading
+import time
+
+MAX_EVENTS = 100000
+
+_enabled = os.environ.get("ORANGE3EXAMPLE_TRACE", "") not in ("", "0")
+_events = collections.deque(maxlen=MAX_EVENTS)  # (name, category, start, duration, tid, args)
+_origin = time.perf_counter()
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _events.append((self.name, self.category, self.start, end - self.start,
+                        threading.get_ident(), self.args))
+        return False
+
+    def set(self, **args):
+        """구간이 끝나기 전에 인자 추가 (예: 결과 크기)"""
+        self.args.update(args)
+
+
+def span(name: str, category: str = "app", **args):
+    """구간 측정용 컨텍스트 매니저"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, category, args)
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def clear():
+    _events.clear()
+
+
+def events() -> list:
+    return list(_events)
+
+
+def summary(prefixes=None) -> list:
+    """구간 이름별 통계 (총 시간 내림차순). prefixes가 있으면 해당 접두어만"""
+    stats = {}
+    for name, category, _, duration, _, _ in list(_events):
+        if prefixes and not name.startswith(tuple(prefixes)):
+            continue
+        entry = stats.setdefault(name, [category, 0, 0.0, 0.0])
+        entry[1] += 1
+        entry[2] += duration
+        entry[3] = max(entry[3], duration)
+    rows = [
+        {"name": name, "category": category, "count": count,
+         "total_ms": total * 1000, "mean_ms": total * 1000 / count, "max_ms": longest * 1000}
+        for name, (category, count, total, longest) in stats.items()
+    ]
+    return sorted(rows, key=lambda row: -row["total_ms"])
+
+
+def format_summary(prefixes=None) -> str:
+    rows = summary(prefixes)
+    if not rows:
+        return "No spans recorded." if _enabled else "Tracing is disabled."
+    width = max(len(row["name"]) for row in rows)
+    lines = [f"{'span':{width}s} {'count':>7s} {'total ms':>10s} {'mean ms':>9s} {'max ms':>9s}"]
+    for row in rows:
+        lines.append(f"{row['name']:{width}s} {row['count']:7d} {row['total_ms']:10.2f} "
+                     f"{row['mean_ms']:9.3f} {row['max_ms']:9.3f}")
+    return "\n".join(lines)
+
+
+def export_chrome_trace(path: str) -> int:
+    """Chrome trace JSON(complete 'X' 이벤트)으로 저장. 저장한 이벤트 수 반환"""
+    pid = os.getpid()
+    trace_events = [
+        {"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+         "ts": (start - _origin) * 1e6, "dur": duration * 1e6,
+         "args": {key: value if isinstance(value, (int, float, str, bool)) else str(value)
+                  for key, value in args.items()}}
+        for name, category, start, duration, tid, args in list(_events)
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+    return len(trace_events)
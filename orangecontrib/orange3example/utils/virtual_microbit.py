@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+import select
+import threading
+import time
+import tty
+
+from orangecontrib.orange3example.utils import framing
+
+_SMILE_FROWN_REPLIES = {
+    "smile": "showing happy icon",
+    "frown": "showing sad icon",
+    "straight": "showing asleep icon",
+}
+
+
+class VirtualMicrobit:
+    """pty 기반 가상 마이크로비트 (하드웨어 없이 시리얼 경로를 측정/테스트하기 위함, POSIX 전용)
+
+    - firmware="smile_frown": smile_frown.py처럼 'Received: ... - ...' 줄로 응답
+    - firmware="echo": microbit.js처럼 받은 줄을 그대로 돌려줌 (pause 동안 대기)
+    - baudrate: 바이트당 10비트 기준으로 송수신 시간을 흉내냄 (0이면 제한 없음)
+    - jitter: 응답마다 0~jitter초의 무작위 지연 추가
+    - binary: '@proto bin' 핸드셰이크에 응답하고 이후 바이너리 프레임으로 동작
+    - on_command: callback(command), 장치가 명령 한 줄/프레임을 받은 시점에 호출 (지연 측정용)
+
+    port 속성의 장치 경로를 connect()/ConnectionPool에 그대로 넘기면 됨
+    """
+
+    def __init__(self, firmware: str = "smile_frown", baudrate: int = 115200,
+                 jitter: float = 0.0, pause: float = None, binary: bool = False,
+                 seed: int = None, on_command=None):
+        if firmware not in ("smile_frown", "echo"):
+            raise ValueError(f"알 수 없는 펌웨어: {firmware}")
+        self.firmware = firmware
+        self.baudrate = baudrate
+        self.jitter = jitter
+        # microbit.js는 수신 전후로 basic.pause(50)을 호출함
+        self.pause = pause if pause is not None else (0.1 if firmware == "echo" else 0.0)
+        self.binary_supported = binary
+        self.binary = False
+        self.received = 0
+        self.on_command = on_command
+        self.port = None
+
+        self._random = random.Random(seed)
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._write_lock = threading.Lock()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # 에코/개행 변환 없이 바이트 그대로 전달
+        self.port = os.ttyname(self._slave)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+    def send_line(self, text: str):
+        """장치 쪽에서 호스트로 한 줄 전송 (센서 값 등)"""
+        if self.binary:
+            self._write(framing.encode_text(text))
+        else:
+            self._write((text + "\n").encode("utf-8"))
+
+    def send_samples(self, values, int16: bool = False):
+        """장치 쪽에서 호스트로 숫자 배열 전송 (바이너리 모드에서만)"""
+        if not self.binary:
+            self.send_line(",".join(str(value) for value in values))
+        elif int16:
+            self._write(framing.encode_int16s(values))
+        else:
+            self._write(framing.encode_floats(values))
+
+    def _wire_delay(self, size: int):
+        if self.baudrate:
+            time.sleep(size * 10 / self.baudrate)
+
+    def _write(self, data: bytes):
+        with self._write_lock:
+            self._wire_delay(len(data))
+            view = memoryview(data)
+            while view:
+                written = os.write(self._master, view)
+                view = view[written:]
+
+    def _reply(self, command: str):
+        self.received += 1
+        if self.on_command:
+            self.on_command(command)
+        if self.pause:
+            time.sleep(self.pause)
+        if self.jitter:
+            time.sleep(self._random.uniform(0, self.jitter))
+        if self.binary:
+            self._write(framing.encode_frame(framing.FRAME_ACK))
+        elif self.firmware == "echo":
+            self._write((command + "\r\n").encode("utf-8"))
+        else:
+            action = _SMILE_FROWN_REPLIES.get(command, "clearing screen")
+            self._write(f"Received: {command} - {action}\n".encode("utf-8"))
+
+    def _handle_line(self, raw: bytes):
+        command = raw.decode("utf-8", errors="ignore").strip()
+        if self.binary_supported and command == framing.HANDSHAKE:
+            self._write((framing.HANDSHAKE_OK + "\n").encode("utf-8"))
+            self.binary = True
+            return
+        self._reply(command)
+
+    def _run(self):
+        pending = b""
+        decoder = framing.FrameDecoder()
+        while not self._stop_event.is_set():
+            ready, _, _ = select.select([self._master], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                data = os.read(self._master, 4096)
+            except OSError:
+                break
+            self._wire_delay(len(data))
+
+            if self.binary:
+                for frame_type, payload in decoder.feed(data):
+                    if frame_type == framing.FRAME_TEXT:
+                        self._reply(str(payload, "utf-8", errors="ignore"))
+                continue
+
+            *lines, pending = (pending + data).split(b"\n")
+            for index, raw in enumerate(lines):
+                self._handle_line(raw)
+                if self.binary:
+                    # 핸드셰이크 뒤에 이어진 바이트는 바이너리로 처리
+                    rest = b"\n".join(lines[index + 1:] + [pending])
+                    pending = b""
+                    for frame_type, payload in decoder.feed(rest):
+                        if frame_type == framing.FRAME_TEXT:
+                            self._reply(str(payload, "utf-8", errors="ignore"))
+                    break
@@ -1,5 +1,4 @@
 # -*- coding: utf-8 -*-
-from . import owllmtransformer
-from . import owmicrobit
-from . import owwebcam
-from . import owimagellm
\ No newline at end of file
+# Widget modules are found by Orange's widget discovery (pkgutil over this
+# package), so nothing is imported here; heavy dependencies (openai, dotenv,
+# PIL, pyserial, OpenCV) are imported by the modules on first use.
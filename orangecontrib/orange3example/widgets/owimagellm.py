@@ -1,16 +1,21 @@
 # -*- coding: utf-8 -*-
-from Orange.widgets.widget import OWWidget, Input, Output
+from Orange.widgets.widget import OWWidget, Input, Output, Msg
 from Orange.widgets import gui
 from Orange.widgets.settings import Setting
 import Orange.data
-from AnyQt.QtWidgets import QTextEdit, QLabel, QVBoxLayout, QHBoxLayout, QLineEdit
+import os
+from AnyQt.QtWidgets import QTextEdit, QLabel, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox, QPushButton
 from AnyQt.QtGui import QPixmap, QImage
-from AnyQt.QtCore import Qt
+from AnyQt.QtCore import Qt, QTimer
 import numpy as np
-import base64
-import io
-from PIL import Image
-from orangecontrib.orange3example.utils.llm import LLM
+import time
+from orangecontrib.orange3example.utils.llm import (
+    LLM, MULTIMODAL_MODEL, MULTIMODAL_ERROR_PREFIX, table_texts)
+from orangecontrib.orange3example.utils import tracing
+from orangecontrib.orange3example.utils.pipeline import StagedPipeline, encode_png_base64
+from orangecontrib.orange3example.utils.results_store import (
+    ResultsStore, input_hash, load_table, new_run_id, DEFAULT_PATH)
+from orangecontrib.orange3example.widgets.tracepanel import TracePanel
 
 class OWImageLLM(OWWidget):
     name = "Image LLM"
@@ -18,6 +23,8 @@ class OWImageLLM(OWWidget):
     icon = "../icons/machine-learning-03-svgrepo-com.svg"
     priority = 20
     api_key = Setting("")
+    persist_results = Setting(False)
+    resume_results = Setting(False)
 
     class Inputs:
         image_data = Input("Image Data", np.ndarray, auto_summary=False)
@@ -26,6 +33,9 @@ class OWImageLLM(OWWidget):
     class Outputs:
         llm_response = Output("LLM Response", Orange.data.Table)
 
+    class Warning(OWWidget.Warning):
+        text_truncated = Msg("{} text row(s) were shortened to fit the model's token budget.")
+
     def __init__(self):
         super().__init__()
 
@@ -53,6 +63,20 @@ class OWImageLLM(OWWidget):
             self.controlArea, self, "Run Multimodal Analysis", callback=self.process
         )
         self.process_button.setDisabled(True)
+        self.pipeline_label = QLabel("")
+
+        # 완료된 응답을 로컬 저장소(SQLite)에 기록하고, 같은 입력은 저장된 응답 사용
+        self.persist_checkbox = QCheckBox("Save results to local store")
+        self.persist_checkbox.setChecked(self.persist_results)
+        self.persist_checkbox.setToolTip(DEFAULT_PATH)
+        self.persist_checkbox.toggled.connect(self.on_store_changed)
+        self.resume_checkbox = QCheckBox("Resume from stored results")
+        self.resume_checkbox.setChecked(self.resume_results)
+        self.resume_checkbox.toggled.connect(self.on_store_changed)
+        self.load_button = QPushButton("Load Stored Results")
+        self.load_button.clicked.connect(self.load_stored_results)
+        self.store = None
+        self.run_id = new_run_id()
         
         # Result output field
         self.result_display = QTextEdit()
@@ -68,17 +92,61 @@ class OWImageLLM(OWWidget):
         control_layout.addWidget(QLabel("Prompt:"))
         control_layout.addWidget(self.prompt_input)
         control_layout.addWidget(self.process_button)
+        control_layout.addWidget(self.pipeline_label)
+        store_layout = QHBoxLayout()
+        store_layout.addWidget(self.persist_checkbox)
+        store_layout.addWidget(self.resume_checkbox)
+        store_layout.addWidget(self.load_button)
+        control_layout.addLayout(store_layout)
         self.controlArea.layout().addLayout(control_layout)
         
         # Display results in main area
         self.mainArea.layout().addWidget(QLabel("LLM Response Result:"))
         self.mainArea.layout().addWidget(self.result_display)
+        self.trace_panel = TracePanel(prefixes=["imagellm.", "pipeline.", "llm."])
+        self.mainArea.layout().addWidget(self.trace_panel)
         
         # Data storage variables
         self.image_data = None
         self.text_data = None
         self.has_image = False
         self.has_text = False
+        self.text_rows = None
+
+        # 인코딩 / API 요청 / 테이블 생성을 백그라운드에서 겹쳐서 실행하고,
+        # 결과는 타이머로 GUI 스레드에서 받아서 출력
+        self.llm = None
+        self.llm_key = None
+        self.pipeline = StagedPipeline(self.prepare_multimodal_data, self.request_job,
+                                       self.build_response_table, max_in_flight=2, queue_size=1)
+        self.result_timer = QTimer(self)
+        self.result_timer.timeout.connect(self.deliver_results)
+        self.result_timer.start(50)
+
+    def onDeleteWidget(self):
+        self.result_timer.stop()
+        self.pipeline.stop()
+        if self.store is not None:
+            self.store.close()
+        super().onDeleteWidget()
+
+    def get_store(self, create=True):
+        """결과 저장소. create=False이면 저장소 파일이 아직 없을 때 만들지 않고 None"""
+        if self.store is None:
+            if not create and not os.path.exists(DEFAULT_PATH):
+                return None
+            self.store = ResultsStore()
+        return self.store
+
+    def run_store(self):
+        """이번 실행에 쓸 저장소. 저장이 꺼져 있으면 이미 있는 저장소 파일에서 이어 하기만 함"""
+        if not (self.persist_results or self.resume_results):
+            return None
+        return self.get_store(create=self.persist_results)
+
+    def on_store_changed(self):
+        self.persist_results = self.persist_checkbox.isChecked()
+        self.resume_results = self.resume_checkbox.isChecked()
 
     @Inputs.image_data
     def set_image_data(self, data):
@@ -103,6 +171,7 @@ class OWImageLLM(OWWidget):
         """Handle text data input"""
         if data is not None and isinstance(data, Orange.data.Table):
             self.text_data = data
+            self.text_rows = self.extract_text_rows(data)
             self.has_text = True
             self.check_inputs()
             # Auto process when text arrives
@@ -110,31 +179,38 @@ class OWImageLLM(OWWidget):
                 self.process()
         else:
             self.text_data = None
+            self.text_rows = None
             self.has_text = False
             self.check_inputs()
 
+    def extract_text_rows(self, data):
+        """문자열 메타 변수를 행마다 이어 붙인 목록. 문자열 변수가 없으면 None"""
+        if not any(isinstance(var, Orange.data.StringVariable) for var in data.domain.metas):
+            return None
+        with tracing.span("imagellm.extract_text", "cpu", rows=len(data)):
+            return list(table_texts(data))
+
     def display_image(self, image_array):
         """Convert numpy array to QPixmap and display"""
         try:
-            # Use image as-is if RGB format
-            if len(image_array.shape) == 3 and image_array.shape[2] == 3:
-                # Convert RGB image to PIL Image
-                pil_image = Image.fromarray(image_array.astype(np.uint8))
-            else:
-                # Convert grayscale or other formats to RGB
-                pil_image = Image.fromarray(image_array.astype(np.uint8))
-                if len(pil_image.getbands()) == 1:
-                    pil_image = pil_image.convert('RGB')
-            
-            # Convert to QPixmap
-            buffer = io.BytesIO()
-            pil_image.save(buffer, format='PNG')
-            qimage = QImage.fromData(buffer.getvalue())
-            pixmap = QPixmap.fromImage(qimage)
-            
-            # Resize image
-            pixmap = pixmap.scaled(200, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-            self.image_label.setPixmap(pixmap)
+            # PNG를 거치지 않고 배열에서 바로 QImage 생성 (웹캠 프레임마다 호출됨)
+            with tracing.span("imagellm.preview_image", "cpu"):
+                image = np.asarray(image_array).astype(np.uint8, copy=False)
+                if image.ndim == 2:
+                    image = np.stack([image] * 3, axis=-1)
+                elif image.shape[2] == 4:
+                    image = image[:, :, :3]
+                elif image.shape[2] == 1:
+                    image = np.repeat(image, 3, axis=2)
+                image = np.ascontiguousarray(image)
+                height, width = image.shape[:2]
+                qimage = QImage(image.data, width, height, 3 * width, QImage.Format_RGB888)
+            with tracing.span("imagellm.render_image", "qt"):
+                pixmap = QPixmap.fromImage(qimage)
+                
+                # Resize image
+                pixmap = pixmap.scaled(200, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                self.image_label.setPixmap(pixmap)
             self.image_label.setStyleSheet("border: none;")
             
         except Exception as e:
@@ -149,57 +225,144 @@ class OWImageLLM(OWWidget):
             self.process_button.setDisabled(True)
 
     def process(self):
-        """Execute multimodal LLM processing"""
+        """Submit the current image/text to the pipeline (returns immediately)"""
+        self.prompt = self.prompt_input.toPlainText()
+        api_key_value = (self.api_key_input.text() or "").strip() or None
+        # Save setting
+        self.api_key = self.api_key_input.text()
+
         try:
-            self.prompt = self.prompt_input.toPlainText()
-            api_key_value = (self.api_key_input.text() or "").strip() or None
-            # Save setting
-            self.api_key = self.api_key_input.text()
-            
-            # Create LLM instance
-            llm = LLM(api_key=api_key_value)
-            
-            # Prepare multimodal data
-            multimodal_data = self.prepare_multimodal_data()
-            
-            # Call LLM API
-            results = llm.get_multimodal_response(self.prompt, multimodal_data)
-            
-            # Convert results to Orange data table (store in meta)
+            # Create LLM instance (reused while the key stays the same)
+            if self.llm is None or self.llm_key != api_key_value:
+                self.llm = LLM(api_key=api_key_value)
+                self.llm_key = api_key_value
+        except Exception as e:
+            self.send_error(f"Error during processing: {str(e)}")
+            return
+
+        # 웹캠 프레임은 계속 바뀌므로 제출 시점의 입력을 작업에 담아 둠
+        store = self.run_store()
+        self.pipeline.submit({
+            "llm": self.llm,
+            "prompt": self.prompt,
+            "image": self.image_data if self.has_image else None,
+            "has_text": self.has_text,
+            "text_rows": self.text_rows,
+            "store": store,
+            "persist": self.persist_results,
+            "resume": self.resume_results and store is not None,
+        })
+        self.update_pipeline_label()
+
+    def request_job(self, job, multimodal_data):
+        """Call LLM API (pipeline request stage, worker thread)"""
+        store = job["store"]
+        model = job["llm"].multimodal_model
+        if store is not None:
+            key = input_hash(job["image"] if job["image"] is not None else b"",
+                             *(job["text_rows"] or []))
+        if job["resume"]:
+            stored = store.lookup(job["prompt"], model, keys=[key])
+            if key in stored:
+                return [stored[key]]
+
+        # 토큰 예산에 맞게 잘라낸 텍스트 항목 수는 경고로 표시
+        packed, job["truncated"] = job["llm"].pack_multimodal(job["prompt"], multimodal_data)
+        started = time.time()
+        results = job["llm"].get_multimodal_response(job["prompt"], packed, packed=True)
+        if job["persist"] and not results[0].startswith(MULTIMODAL_ERROR_PREFIX):
+            store.append(job["prompt"], model, None, results[0], started,
+                         run_id=self.run_id, key=key)
+        return results
+
+    def load_stored_results(self):
+        """Send all stored responses for the current prompt without calling the API"""
+        self.prompt = self.prompt_input.toPlainText()
+        store = self.get_store(create=False)
+        if store is None:
+            self.pipeline_label.setText("No stored responses")
+            return
+        with tracing.span("imagellm.load_store", "io"):
+            response_data = load_table(store, self.prompt, MULTIMODAL_MODEL, "LLM Response")
+        with tracing.span("imagellm.send_output", "qt"):
+            self.Outputs.llm_response.send(response_data)
+        with tracing.span("imagellm.render_result", "qt"):
+            shown = [str(value) for value in response_data.metas[:1000, 0]]
+            if len(response_data) > len(shown):
+                shown.append(f"... ({len(response_data) - len(shown)} more rows)")
+            self.result_display.setPlainText("\n".join(shown))
+        self.pipeline_label.setText(f"Loaded {len(response_data)} stored responses")
+
+    def build_response_table(self, job, results, error):
+        """Convert results to Orange data table (pipeline assemble stage, worker thread)"""
+        with tracing.span("imagellm.build_table", "cpu"):
+            if error is not None:
+                error_msg = f"Error during processing: {str(error)}"
+                domain = Orange.data.Domain([], metas=[Orange.data.StringVariable("Error")])
+                return [error_msg], Orange.data.Table.from_list(domain, [[error_msg]]), 0
             domain = Orange.data.Domain([], metas=[Orange.data.StringVariable("LLM Response")])
-            response_data = Orange.data.Table.from_list(domain, [[str(result)] for result in results])
-            
-            # Send output
+            return (results, Orange.data.Table.from_list(domain, [[str(result)] for result in results]),
+                    job.get("truncated", 0))
+
+    def deliver_results(self):
+        """Send finished pipeline results (GUI thread, QTimer)"""
+        outputs = self.pipeline.poll()
+        if not outputs:
+            if self.pipeline.in_flight:
+                self.update_pipeline_label()
+            return
+        # 여러 개가 한꺼번에 끝났으면 가장 최근 결과만 내보냄
+        output = outputs[-1]
+        if isinstance(output, Exception):
+            self.send_error(f"Error during processing: {str(output)}")
+            self.update_pipeline_label()
+            return
+        results, response_data, truncated = output
+        if truncated:
+            self.Warning.text_truncated(truncated)
+        else:
+            self.Warning.text_truncated.clear()
+
+        # Send output
+        with tracing.span("imagellm.send_output", "qt"):
             self.Outputs.llm_response.send(response_data)
-            
-            # Display results
+
+        # Display results
+        with tracing.span("imagellm.render_result", "qt"):
             self.result_display.setPlainText("\n".join(results))
-            
-        except Exception as e:
-            error_msg = f"Error during processing: {str(e)}"
-            self.result_display.setPlainText(error_msg)
-            
-            # Send error result as output
-            domain = Orange.data.Domain([], metas=[Orange.data.StringVariable("Error")])
-            error_data = Orange.data.Table.from_list(domain, [[error_msg]])
-            self.Outputs.llm_response.send(error_data)
+        self.update_pipeline_label()
+
+    def send_error(self, error_msg):
+        self.result_display.setPlainText(error_msg)
+
+        # Send error result as output
+        domain = Orange.data.Domain([], metas=[Orange.data.StringVariable("Error")])
+        error_data = Orange.data.Table.from_list(domain, [[error_msg]])
+        self.Outputs.llm_response.send(error_data)
+
+    def update_pipeline_label(self):
+        stats = self.pipeline.stats()
+        text = (f"In flight: {stats['in_flight']}, done: {stats['completed']}, "
+                f"dropped: {stats['dropped'] + stats['stale']}")
+        if stats["results_per_sec"]:
+            text += f", {stats['results_per_sec']:.2f} results/s"
+        if "encode_ms" in stats and "request_ms" in stats:
+            text += f" (encode {stats['encode_ms']:.0f} ms, request {stats['request_ms']:.0f} ms)"
+        self.pipeline_label.setText(text)
 
-    def prepare_multimodal_data(self):
-        """Prepare multimodal data"""
+    def prepare_multimodal_data(self, job=None):
+        """Prepare multimodal data (pipeline encode stage; uses only the job snapshot)"""
+        if job is None:
+            job = {"image": self.image_data if self.has_image else None,
+                   "has_text": self.has_text, "text_rows": self.text_rows}
         multimodal_content = []
         
         # Encode image data to base64 if present
-        if self.has_image and self.image_data is not None:
+        if job["image"] is not None:
             try:
-                # Encode image to base64
-                pil_image = Image.fromarray(self.image_data.astype(np.uint8))
-                buffer = io.BytesIO()
-                pil_image.save(buffer, format='PNG')
-                image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                
                 multimodal_content.append({
                     "type": "image",
-                    "data": image_base64,
+                    "data": encode_png_base64(job["image"]),
                     "description": "Image from Microbit"
                 })
             except Exception as e:
@@ -209,32 +372,17 @@ class OWImageLLM(OWWidget):
                 })
         
         # Process text data if present
-        if self.has_text and self.text_data is not None:
-            try:
-                # Convert string-meta variables to text
-                string_meta_indices = [
-                    idx for idx, var in enumerate(self.text_data.domain.metas)
-                    if isinstance(var, Orange.data.StringVariable)
-                ]
-                
-                if string_meta_indices:
-                    text_content = [
-                        " ".join(str(row.metas[idx]) for idx in string_meta_indices)
-                        for row in self.text_data
-                    ]
-                    multimodal_content.append({
-                        "type": "text",
-                        "data": "\n".join(text_content)
-                    })
-                else:
-                    multimodal_content.append({
-                        "type": "text",
-                        "data": "No text data"
-                    })
-            except Exception as e:
+        if job["has_text"]:
+            if job["text_rows"] is not None:
+                # 행마다 별도 항목으로 넘겨야 토큰 예산을 넘을 때 행 단위로 잘라낼 수 있음
+                # (get_multimodal_response가 이어진 텍스트 항목을 한 블록으로 합침)
+                multimodal_content.extend(
+                    {"type": "text", "data": text} for text in job["text_rows"]
+                )
+            else:
                 multimodal_content.append({
                     "type": "text",
-                    "data": f"Text processing error: {str(e)}"
+                    "data": "No text data"
                 })
         
         return multimodal_content
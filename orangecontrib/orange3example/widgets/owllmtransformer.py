@@ -3,8 +3,15 @@ from Orange.widgets.widget import OWWidget, Input, Output
 from Orange.widgets import gui
 from Orange.widgets.settings import Setting
 import Orange.data
-from AnyQt.QtWidgets import QTextEdit, QLineEdit, QLabel
-from orangecontrib.orange3example.utils.llm import LLM
+import os
+import threading
+from AnyQt.QtWidgets import QTextEdit, QLineEdit, QLabel, QCheckBox, QDoubleSpinBox, QHBoxLayout, QPushButton
+from orangecontrib.orange3example.utils.llm import LLM, TEXT_MODEL, table_texts
+from orangecontrib.orange3example.utils import tracing
+from orangecontrib.orange3example.utils.semantic_cache import SemanticCache, cached_responses
+from orangecontrib.orange3example.utils.results_store import (
+    ResultsStore, input_hash, load_table, new_run_id, DEFAULT_PATH)
+from orangecontrib.orange3example.widgets.tracepanel import TracePanel
 
 class OWLLMTransformer(OWWidget):
     name = "LLM Transformer"
@@ -12,6 +19,10 @@ class OWLLMTransformer(OWWidget):
     icon = "../icons/machine-learning-03-svgrepo-com.svg"
     priority = 10
     api_key = Setting("")
+    use_cache = Setting(False)
+    cache_threshold = Setting(0.9)
+    persist_results = Setting(False)
+    resume_results = Setting(False)
 
     class Inputs:
         text_data = Input("Input Data", Orange.data.Table)
@@ -36,6 +47,51 @@ class OWLLMTransformer(OWWidget):
         self.prompt_input.setMinimumHeight(100)
         self.controlArea.layout().addWidget(self.prompt_input)
 
+        # 공백/대소문자/오타만 다른 행은 이전 응답 재사용
+        cache_layout = QHBoxLayout()
+        self.cache_checkbox = QCheckBox("Reuse answers for near-duplicate rows")
+        self.cache_checkbox.setChecked(self.use_cache)
+        self.cache_checkbox.setToolTip(
+            "Rows that differ only in spacing, case, punctuation or small typos reuse an earlier answer.\n"
+            "Rows must have the same words, each at most one typo apart, and tokens containing digits\n"
+            "must match exactly (\"not recommend\", \"unfriendly\" and \"90 dollars\" are never reused\n"
+            "for \"recommend\", \"friendly\" and \"50 dollars\"). A one-letter change such as \"am\"/\"pm\"\n"
+            "as separate words can still match.")
+        self.cache_checkbox.toggled.connect(self.on_cache_changed)
+        cache_layout.addWidget(self.cache_checkbox)
+        cache_layout.addWidget(QLabel("Similarity ≥"))
+        self.threshold_spin = QDoubleSpinBox()
+        self.threshold_spin.setRange(0.5, 1.0)
+        self.threshold_spin.setSingleStep(0.01)
+        self.threshold_spin.setValue(self.cache_threshold)
+        self.threshold_spin.valueChanged.connect(self.on_cache_changed)
+        cache_layout.addWidget(self.threshold_spin)
+        self.controlArea.layout().addLayout(cache_layout)
+        self.cache_label = QLabel()
+        self.controlArea.layout().addWidget(self.cache_label)
+        self.cache = SemanticCache(threshold=self.cache_threshold)
+        self.cache_prompt = None
+        self.update_cache_label()
+
+        # 완료된 행을 로컬 저장소(SQLite)에 바로 기록하고, 같은 입력은 저장된 응답으로 이어 하기
+        store_layout = QHBoxLayout()
+        self.persist_checkbox = QCheckBox("Save results to local store")
+        self.persist_checkbox.setChecked(self.persist_results)
+        self.persist_checkbox.setToolTip(DEFAULT_PATH)
+        self.persist_checkbox.toggled.connect(self.on_store_changed)
+        store_layout.addWidget(self.persist_checkbox)
+        self.resume_checkbox = QCheckBox("Resume from stored results")
+        self.resume_checkbox.setChecked(self.resume_results)
+        self.resume_checkbox.toggled.connect(self.on_store_changed)
+        store_layout.addWidget(self.resume_checkbox)
+        self.load_button = QPushButton("Load Stored Results")
+        self.load_button.clicked.connect(self.load_stored_results)
+        store_layout.addWidget(self.load_button)
+        self.controlArea.layout().addLayout(store_layout)
+        self.store_label = QLabel()
+        self.controlArea.layout().addWidget(self.store_label)
+        self.store = None
+
         self.transform_button = gui.button(
             self.controlArea, self, "Transform", callback=self.process
         )
@@ -47,24 +103,89 @@ class OWLLMTransformer(OWWidget):
         self.result_display.setReadOnly(True)
         self.mainArea.layout().addWidget(self.result_display)
 
+        self.trace_panel = TracePanel(prefixes=["transformer.", "llm."])
+        self.mainArea.layout().addWidget(self.trace_panel)
+
         self.text_data = None
 
     @Inputs.text_data
     def set_data(self, data):
         if isinstance(data, Orange.data.Table):
-            string_meta_indices = [
-                idx for idx, var in enumerate(data.domain.metas)
-                if isinstance(var, Orange.data.StringVariable)
-            ]
-            data = [
-                " ".join(str(row.metas[idx]) for idx in string_meta_indices)
-                for row in data
-            ]
+            with tracing.span("transformer.extract_text", "cpu", rows=len(data)):
+                data = list(table_texts(data))
 
         self.text_data = data
         self.transform_button.setDisabled(False)
 
 
+    def onDeleteWidget(self):
+        if self.store is not None:
+            self.store.close()
+        super().onDeleteWidget()
+
+    def get_store(self, create=True):
+        """결과 저장소. create=False이면 저장소 파일이 아직 없을 때 만들지 않고 None"""
+        if self.store is None:
+            if not create and not os.path.exists(DEFAULT_PATH):
+                return None
+            self.store = ResultsStore()
+        return self.store
+
+    def run_store(self):
+        """이번 실행에 쓸 저장소. 저장이 꺼져 있으면 이미 있는 저장소 파일에서 이어 하기만 함"""
+        if not (self.persist_results or self.resume_results):
+            return None
+        return self.get_store(create=self.persist_results)
+
+    def on_store_changed(self):
+        self.persist_results = self.persist_checkbox.isChecked()
+        self.resume_results = self.resume_checkbox.isChecked()
+
+    def on_cache_changed(self):
+        self.use_cache = self.cache_checkbox.isChecked()
+        self.cache_threshold = self.threshold_spin.value()
+        self.cache.threshold = self.cache_threshold
+        self.update_cache_label()
+
+    def update_cache_label(self):
+        stats = self.cache.stats()
+        self.threshold_spin.setEnabled(self.use_cache)
+        self.cache_label.setText(
+            f"Cache: {stats['entries']} entries, hit rate {stats['hit_rate']:.0%} "
+            f"({stats['hits']}/{stats['hits'] + stats['misses']}), "
+            f"index {stats['memory_bytes'] / 1e6:.1f} MB"
+        )
+
+    def load_stored_results(self):
+        """Send stored results for the current prompt without calling the API"""
+        self.prompt = self.prompt_input.toPlainText()
+        store = self.get_store(create=False)
+        if store is None:
+            self.store_label.setText("Store: no stored results")
+            return
+        domain = Orange.data.Domain([], metas=[Orange.data.StringVariable("Transformed Text")])
+        with tracing.span("transformer.load_store", "io"):
+            if self.text_data is not None:
+                # 입력 행 순서대로, 저장되지 않은 행은 빈 문자열
+                texts = list(self.text_data)
+                stored = store.lookup(self.prompt, TEXT_MODEL, texts)
+                results = [stored.get(input_hash(text), "") for text in texts]
+                transformed_data = Orange.data.Table.from_list(domain, [[result] for result in results])
+                missing = sum(1 for result in results if not result)
+                self.store_label.setText(f"Store: loaded {len(texts) - missing} rows, {missing} missing")
+            else:
+                transformed_data = load_table(store, self.prompt, TEXT_MODEL, "Transformed Text")
+                self.store_label.setText(f"Store: loaded {len(transformed_data)} rows")
+
+        with tracing.span("transformer.send_output", "qt"):
+            self.Outputs.transformed_data.send(transformed_data)
+        with tracing.span("transformer.render", "qt"):
+            shown = [str(value) for value in transformed_data.metas[:1000, 0]]
+            if len(transformed_data) > len(shown):
+                shown.append(f"... ({len(transformed_data) - len(shown)} more rows)")
+            self.result_text = "\n".join(shown)
+            self.result_display.setPlainText(self.result_text)
+
     def process(self):
         """Call GPT API only when Transform button is clicked"""
         self.prompt = self.prompt_input.toPlainText()
@@ -74,10 +195,72 @@ class OWLLMTransformer(OWWidget):
         domain = Orange.data.Domain([], metas=[Orange.data.StringVariable("Transformed Text")])
 
         llm = LLM(api_key=api_key_value)
-        results = llm.get_response(self.prompt, self.text_data) 
-        transformed_data = Orange.data.Table.from_list(domain, [[str(result)] for result in results])
+        texts = list(self.text_data)
+        results = [None] * len(texts)
+        keys = None
+        store = self.run_store()
+        if store is not None:
+            keys = [input_hash(text) for text in texts]
+        if self.resume_results and store is not None:
+            with tracing.span("transformer.resume", "io", rows=len(texts)):
+                stored = store.lookup(self.prompt, llm.model, keys=keys)
+            results = [stored.get(key) for key in keys]
+        pending = [index for index, result in enumerate(results) if result is None]
+
+        # API가 실제로 답한 행만 요청이 끝나는 즉시 기록. 캐시에서 빌려 온 응답은
+        # 다른 입력에 대한 답이므로 이어 하기에서 이 행의 답으로 재생되지 않도록 기록하지 않음
+        saved = set()
+        saved_lock = threading.Lock()
+        run_id = new_run_id()
+
+        def record(row, started, finished, output):
+            if output.startswith("Error:"):
+                return
+            store.append(self.prompt, llm.model, texts[row], output, started, finished,
+                         run_id=run_id, row_index=row, key=keys[row])
+            with saved_lock:
+                saved.add(row)
+
+        def respond(batch):
+            """batch: 요청할 텍스트 목록 (pending의 일부)"""
+            rows = [first_row[text] for text in batch]
+            on_complete = None
+            if self.persist_results:
+                def on_complete(index, data, result, started, finished):
+                    record(rows[index], started, finished, result)
+            return [result for _, result in
+                    llm.iter_responses(self.prompt, batch, on_complete=on_complete)]
+
+        pending_texts = [texts[index] for index in pending]
+        first_row = {}
+        for index in pending:
+            first_row.setdefault(texts[index], index)
+        with tracing.span("transformer.llm_calls", "network", rows=len(pending)):
+            if self.use_cache:
+                # 프롬프트가 바뀌면 이전 응답은 재사용할 수 없음
+                if self.cache_prompt != self.prompt:
+                    self.cache.clear()
+                    self.cache_prompt = self.prompt
+                answers = cached_responses(
+                    self.cache, pending_texts, respond,
+                    is_cacheable=lambda result: not result.startswith("Error:"))
+                self.update_cache_label()
+            else:
+                answers = respond(pending_texts) if pending_texts else []
+        for index, answer in zip(pending, answers):
+            results[index] = answer
+
+        if store is not None:
+            self.store_label.setText(
+                f"Store: {len(texts) - len(pending)} resumed, "
+                f"{len(saved) if self.persist_results else 0} saved, "
+                f"{store.count(self.prompt, llm.model)} stored for this prompt")
+        with tracing.span("transformer.build_table", "cpu", rows=len(results)):
+            transformed_data = Orange.data.Table.from_list(domain, [[str(result)] for result in results])
 
-        self.Outputs.transformed_data.send(transformed_data)
+        with tracing.span("transformer.send_output", "qt"):
+            self.Outputs.transformed_data.send(transformed_data)
 
-        self.result_text = "\n".join(results)
-        self.result_display.setPlainText(self.result_text)
+        with tracing.span("transformer.render", "qt"):
+            self.result_text = "\n".join(results)
+            self.result_display.setPlainText(self.result_text)
@@ -1,13 +1,92 @@
 # -*- coding: utf-8 -*-
-from Orange.widgets.widget import OWWidget, Input
+from Orange.widgets.widget import OWWidget, Input, Output
+from Orange.widgets.utils.concurrent import ConcurrentWidgetMixin, TaskState
 import Orange.data
-from Orange.data import StringVariable
+from Orange.data import StringVariable, ContinuousVariable
 
-from AnyQt.QtWidgets import QTextEdit, QPushButton, QComboBox, QLabel, QHBoxLayout, QWidget, QVBoxLayout, QCheckBox
+from AnyQt.QtWidgets import QTextEdit, QPushButton, QComboBox, QLabel, QHBoxLayout, QWidget, QVBoxLayout, QCheckBox, QSpinBox
+from AnyQt.QtCore import QTimer
+import collections
+import threading
+import time
+import numpy as np
 from orangecontrib.orange3example.utils import microbit
+from orangecontrib.orange3example.utils.microbit_pool import ConnectionPool
+from orangecontrib.orange3example.utils.telemetry import SensorRingBuffer
+from orangecontrib.orange3example.utils import tracing
+from orangecontrib.orange3example.widgets.tracepanel import TracePanel
 
+BROADCAST = "(Broadcast to all)"
+PROTOCOLS = [("Text", "text"), ("Auto (binary if supported)", "auto"), ("Binary", "binary")]
+FLOW_MODES = [("ACK window (rows in flight)", "ack"), ("Fixed rate (rows/s)", "rate")]
+STREAM_CHUNK_ROWS = 256
+STREAM_QUEUE_LIMIT = 64
 
-class OWMicrobit(OWWidget):
+
+def row_texts(data, string_vars, route_var=None):
+    """Yield (route key, text) for each row that has non-empty string values"""
+    for row in data:
+        texts = []
+        for var in string_vars:
+            value = str(row[var])
+            if value != "?" and value:
+                texts.append(value)
+        if texts:
+            key = str(row[route_var]) if route_var is not None else None
+            yield key, " ".join(texts)
+
+
+def stream_table(pool, data, string_vars, route_var, flow_mode, flow_value,
+                 state: TaskState):
+    """Send the table one row per message, chunk by chunk, with flow control.
+
+    Runs on a worker thread. Only one chunk of rows is materialized at a
+    time and the device queues are bounded by the ACK window (or a small
+    fixed limit in rate mode), so memory does not grow with the table.
+    """
+    total = len(data)
+    sent = skipped = 0
+    window = flow_value if flow_mode == "ack" else STREAM_QUEUE_LIMIT
+    interval = 1.0 / flow_value if flow_mode == "rate" else 0.0
+    next_send = time.perf_counter()
+
+    for start in range(0, total, STREAM_CHUNK_ROWS):
+        with tracing.span("microbit.slice_chunk", "cpu", start=start):
+            chunk = data[start:start + STREAM_CHUNK_ROWS]
+        for key, text in row_texts(chunk, string_vars, route_var):
+            if state.is_interruption_requested():
+                return sent, skipped, True
+
+            if route_var is not None:
+                device = pool.resolve(key)
+                devices = [device] if device is not None else []
+            else:
+                devices = pool.connected_devices()
+
+            if interval:
+                delay = next_send - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_send = max(next_send, time.perf_counter() - interval) + interval
+
+            delivered = False
+            for device in devices:
+                while not device.wait_for_capacity(window, 0.2):
+                    if state.is_interruption_requested():
+                        return sent, skipped, True
+                    if not device.is_connected():
+                        break
+                else:  # 창에 자리가 생긴 장치에만 전송, 끊긴 장치는 건너뜀
+                    delivered = device.send(text) or delivered
+            if delivered:
+                sent += 1
+            else:
+                skipped += 1
+        state.set_progress_value(100 * min(total, start + STREAM_CHUNK_ROWS) / total)
+    return sent, skipped, False
+
+
+class OWMicrobit(OWWidget, ConcurrentWidgetMixin):
     name = "Microbit Communicator"
     description = "Send data to Microbit through serial port"
     icon = "../icons/machine-learning-03-svgrepo-com.svg"
@@ -16,10 +95,22 @@ class OWMicrobit(OWWidget):
     class Inputs:
         text_data = Input("Text Input", Orange.data.Table)
 
+    class Outputs:
+        received_data = Output("Received Data", Orange.data.Table)
+
     def __init__(self):
-        super().__init__()
+        OWWidget.__init__(self)
+        ConcurrentWidgetMixin.__init__(self)
 
         self.text_data = None
+        self.received = SensorRingBuffer(capacity=1000)
+        self.emitted_version = 0
+        self.received_domain = None
+        # Lines waiting to be logged, filled by device reader threads
+        self.received_log = collections.deque(maxlen=50)
+        self.received_log_lock = threading.Lock()
+        self.pool = ConnectionPool(on_line=self.on_line_received,
+                                   on_samples=self.on_samples_received)
 
         # Port selection UI
         port_layout = QHBoxLayout()
@@ -38,11 +129,27 @@ class OWMicrobit(OWWidget):
         self.connect_button.clicked.connect(self.connect_to_microbit)
         port_layout.addWidget(self.connect_button)
 
+        self.disconnect_button = QPushButton("Disconnect")
+        self.disconnect_button.clicked.connect(self.disconnect_from_microbit)
+        port_layout.addWidget(self.disconnect_button)
+
         self.status_label = QLabel("Not Connected")
         port_layout.addWidget(self.status_label)
 
         self.controlArea.layout().addWidget(port_widget)
 
+        # Routing: send each row to the device named in a column
+        route_layout = QHBoxLayout()
+        route_layout.addWidget(QLabel("Route by:"))
+        self.route_combo = QComboBox()
+        self.route_combo.addItem(BROADCAST)
+        route_layout.addWidget(self.route_combo)
+        route_layout.addWidget(QLabel("Protocol:"))
+        self.protocol_combo = QComboBox()
+        self.protocol_combo.addItems([label for label, _ in PROTOCOLS])
+        route_layout.addWidget(self.protocol_combo)
+        self.controlArea.layout().addLayout(route_layout)
+
         # Text input for sending
         self.send_box = QTextEdit()
         self.send_box.setPlaceholderText("Enter text to send to Microbit")
@@ -62,15 +169,78 @@ class OWMicrobit(OWWidget):
         
         self.controlArea.layout().addLayout(button_layout)
 
+        # Streaming send: one row per message with flow control
+        stream_layout = QHBoxLayout()
+        self.stream_checkbox = QCheckBox("Stream rows")
+        self.stream_checkbox.setChecked(True)
+        stream_layout.addWidget(self.stream_checkbox)
+        self.flow_combo = QComboBox()
+        self.flow_combo.addItems([label for label, _ in FLOW_MODES])
+        stream_layout.addWidget(self.flow_combo)
+        self.flow_spin = QSpinBox()
+        self.flow_spin.setRange(1, 10000)
+        self.flow_spin.setValue(4)
+        stream_layout.addWidget(self.flow_spin)
+        self.stream_button = QPushButton("Send Table")
+        self.stream_button.clicked.connect(self.stream_table_to_microbit)
+        stream_layout.addWidget(self.stream_button)
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_streaming)
+        stream_layout.addWidget(self.cancel_button)
+        self.controlArea.layout().addLayout(stream_layout)
+
+        # Receive options: ring buffer size and output rate limit
+        receive_layout = QHBoxLayout()
+        receive_layout.addWidget(QLabel("Keep last"))
+        self.buffer_spin = QSpinBox()
+        self.buffer_spin.setRange(10, 1000000)
+        self.buffer_spin.setValue(self.received.capacity)
+        self.buffer_spin.valueChanged.connect(self.received.resize)
+        receive_layout.addWidget(self.buffer_spin)
+        receive_layout.addWidget(QLabel("rows, emit every"))
+        self.emit_spin = QSpinBox()
+        self.emit_spin.setRange(50, 60000)
+        self.emit_spin.setSingleStep(100)
+        self.emit_spin.setSuffix(" ms")
+        self.emit_spin.setValue(500)
+        self.emit_spin.valueChanged.connect(lambda value: self.emit_timer.setInterval(value))
+        receive_layout.addWidget(self.emit_spin)
+        self.clear_button = QPushButton("Clear")
+        self.clear_button.clicked.connect(self.clear_received)
+        receive_layout.addWidget(self.clear_button)
+        self.controlArea.layout().addLayout(receive_layout)
+
         # Log output area
         self.log_box = QTextEdit()
         self.log_box.setReadOnly(True)
         self.log_box.setMaximumHeight(100)
+        self.log_box.document().setMaximumBlockCount(500)
         self.controlArea.layout().addWidget(self.log_box)
 
+        self.trace_panel = TracePanel(prefixes=["microbit.", "serial."])
+        self.controlArea.layout().addWidget(self.trace_panel)
+
+        # Poll pool status (in-memory only, no serial I/O on the GUI thread)
+        self.status_timer = QTimer()
+        self.status_timer.timeout.connect(self.update_status)
+        self.status_timer.start(1000)
+
+        # Rate-limited emission of received data
+        self.emit_timer = QTimer()
+        self.emit_timer.timeout.connect(self.emit_received)
+        self.emit_timer.start(self.emit_spin.value())
+
         # Load initial port list
         self.refresh_ports()
 
+    def onDeleteWidget(self):
+        self.shutdown()
+        self.status_timer.stop()
+        self.emit_timer.stop()
+        self.pool.close()
+        super().onDeleteWidget()
+
     def log(self, text):
         self.log_box.append(text)
 
@@ -97,21 +267,111 @@ class OWMicrobit(OWWidget):
             return
 
         port = self.port_combo.currentText()
+        if not port:
+            self.log("No port selected.")
+            return
         try:
-            microbit.connect(port)
-            self.status_label.setText(f"Connected ({port})")
-            self.log(f"Connected to port {port}.")
-                
+            # Opening the port happens on the device's own thread
+            self.pool.device_options["protocol"] = PROTOCOLS[self.protocol_combo.currentIndex()][1]
+            self.pool.connect(port)
+            self.log(f"Connecting to port {port}...")
+            self.update_status()
+
         except Exception as e:
             self.status_label.setText(f"Connection failed")
             self.log(f"Connection failed: {str(e)}")
 
+    def disconnect_from_microbit(self):
+        port = self.port_combo.currentText()
+        if self.pool.get(port) is None:
+            self.log(f"Port {port} is not connected.")
+            return
+        self.pool.disconnect(port)
+        self.log(f"Disconnected from port {port}.")
+        self.update_status()
+
+    def update_status(self):
+        status = self.pool.status()
+        if not status:
+            self.status_label.setText("Not Connected")
+            return
+        connected = [port for port, info in status.items() if info["status"] == "connected"]
+        self.status_label.setText(f"Connected ({len(connected)}/{len(status)})")
+        self.status_label.setToolTip("\n".join(
+            f"{port}: {info['status']} ({info['protocol']})" + (f" ({info['last_error']})" if info["last_error"] else "")
+            for port, info in sorted(status.items())
+        ))
+
+    def on_line_received(self, port, line):
+        """Called on a device reader thread: only touch thread-safe buffers"""
+        self.received.append_line(line, port)
+        with self.received_log_lock:
+            self.received_log.append(f"[{port}] {line}")
+
+    def on_samples_received(self, port, values):
+        """Called on a device reader thread for binary numeric frames"""
+        self.received.append_array(values, port)
+
+    def emit_received(self):
+        """Send buffered samples at most once per emit interval, only if changed"""
+        with self.received_log_lock:
+            lines = list(self.received_log)
+            self.received_log.clear()
+        for line in lines:
+            self.log(f"Received: {line}")
+
+        if self.received.version == self.emitted_version:
+            return
+        self.emitted_version = self.received.version
+        table = self.received_table()
+        with tracing.span("microbit.send_output", "qt"):
+            self.Outputs.received_data.send(table)
+
+    def received_table(self):
+        with tracing.span("microbit.build_table", "cpu") as span:
+            columns, times, values, sources, lines = self.received.snapshot()
+            span.set(rows=len(times))
+            if not len(times):
+                return None
+            if self.received_domain is None or \
+                    [var.name for var in self.received_domain.attributes[1:]] != columns:
+                self.received_domain = Orange.data.Domain(
+                    [ContinuousVariable("time (s)")] + [ContinuousVariable(name) for name in columns],
+                    metas=[StringVariable("Device"), StringVariable("Line")])
+            X = np.column_stack((times, values))
+            metas = np.column_stack((sources, lines))
+            return Orange.data.Table.from_numpy(self.received_domain, X, metas=metas)
+
+    def clear_received(self):
+        self.received.clear()
+
+    def update_route_columns(self, data):
+        current = self.route_combo.currentText()
+        self.route_combo.clear()
+        self.route_combo.addItem(BROADCAST)
+        if data is not None:
+            self.route_combo.addItems(
+                [var.name for var in data.domain.variables + data.domain.metas])
+        index = self.route_combo.findText(current)
+        self.route_combo.setCurrentIndex(max(index, 0))
+
+    def route_variable(self):
+        if self.text_data is None or self.route_combo.currentIndex() <= 0:
+            return None
+        name = self.route_combo.currentText()
+        domain = self.text_data.domain
+        for var in domain.variables + domain.metas:
+            if var.name == name:
+                return var
+        return None
+
     @Inputs.text_data
     def set_text_data(self, data):
         """Handle input text data"""
         if data is None:
             self.log("Input data is None.")
             self.text_data = None
+            self.update_route_columns(None)
             if not self.auto_send_checkbox.isChecked():
                 self.send_box.clear()
             return
@@ -121,26 +381,31 @@ class OWMicrobit(OWWidget):
             return
             
         self.text_data = data
+        self.update_route_columns(data)
         text = ""
+        rows = []
+
+        if self.stream_checkbox.isChecked():
+            # Rows are extracted and sent chunk by chunk on a worker thread
+            self.log(f"Received input data: {len(data)} rows")
+            if self.auto_send_checkbox.isChecked():
+                self.stream_table_to_microbit()
+            else:
+                self.log("Press 'Send Table' to stream the rows.")
+            return
         
         try:
             # Extract text from all string variables (attributes, class, metas)
             all_vars = data.domain.variables + data.domain.metas
             string_vars = [var for var in all_vars if isinstance(var, StringVariable)]
+            route_var = self.route_variable()
             
             if string_vars:
-                text_content = []
-                for row in data:
-                    row_texts = []
-                    for var in string_vars:
-                        value = str(row[var]) 
-                        if value != "?" and value:
-                            row_texts.append(value)
-                    if row_texts:
-                        text_content.append(" ".join(row_texts))
+                with tracing.span("microbit.extract_text", "cpu", rows=len(data)):
+                    rows = list(row_texts(data, string_vars, route_var))
                         
-                if text_content:
-                    text = "\n".join(text_content)
+                if rows:
+                    text = "\n".join(row_text for _, row_text in rows)
                 else:
                     self.log("String variables exist but no valid text.")
             else:
@@ -149,7 +414,10 @@ class OWMicrobit(OWWidget):
             if text:
                 self.log(f"Received input data: {text}")
                 if self.auto_send_checkbox.isChecked():
-                    self.send_text_to_microbit(text)
+                    if route_var is not None:
+                        self.send_routed_to_microbit(rows)
+                    else:
+                        self.send_text_to_microbit(text)
                 else:
                     self.send_box.setPlainText(text)
             else:
@@ -161,33 +429,83 @@ class OWMicrobit(OWWidget):
             self.log(f"Failed to extract input text: {e}")
 
     def send_text_to_microbit(self, text: str):
-        """Send text to Microbit (one-way)"""
+        """Broadcast text to all connected Microbits (one-way)"""
         if not text:
             self.log("No text to send.")
             return
 
-        if not microbit:
-            self.log("No microbit module.")
-            return
-
-        if not microbit.is_connected():
+        if not self.pool.connected_ports():
             self.log("Port not connected.")
             return
 
         try:
-            # Use non-blocking send only
-            if hasattr(microbit, 'send_text'):
-                success = microbit.send_text(text)
-                if success:
-                    self.log(f"Sent: {text}")
-                else:
-                    self.log("Send failed")
+            # Only enqueues; each device's writer thread does the serial I/O
+            with tracing.span("microbit.enqueue", "cpu"):
+                count = self.pool.broadcast(text)
+            if count:
+                self.log(f"Sent to {count} device(s): {text}")
             else:
-                self.log("Error: 'send_text' function not found in microbit module.")
+                self.log("Send failed")
                 
         except Exception as e:
             self.log(f"Error during send: {str(e)}")
 
+    def send_routed_to_microbit(self, rows):
+        """Send each (device, text) row to the device named in the routing column"""
+        if not self.pool.connected_ports():
+            self.log("Port not connected.")
+            return
+
+        try:
+            with tracing.span("microbit.enqueue", "cpu", rows=len(rows)):
+                result = self.pool.send_routed(rows)
+            self.log(f"Routed {result['sent']} row(s)"
+                     + (f", {result['unrouted']} without a connected device" if result["unrouted"] else ""))
+        except Exception as e:
+            self.log(f"Error during send: {str(e)}")
+
+    def stream_table_to_microbit(self):
+        """Stream the input table off the GUI thread, one row per message"""
+        if self.text_data is None:
+            self.log("No input table.")
+            return
+
+        if not self.pool.connected_ports():
+            self.log("Port not connected.")
+            return
+
+        domain = self.text_data.domain
+        string_vars = [var for var in domain.variables + domain.metas
+                       if isinstance(var, StringVariable)]
+        if not string_vars:
+            self.log("No String variables in input table.")
+            return
+
+        flow_mode = FLOW_MODES[self.flow_combo.currentIndex()][1]
+        self.log(f"Streaming {len(self.text_data)} rows...")
+        self.cancel_button.setEnabled(True)
+        self.start(stream_table, self.pool, self.text_data, string_vars,
+                   self.route_variable(), flow_mode, self.flow_spin.value())
+
+    def cancel_streaming(self):
+        self.cancel()
+        self.cancel_button.setEnabled(False)
+        self.log("Streaming cancelled.")
+
+    def on_partial_result(self, result):
+        pass
+
+    def on_done(self, result):
+        sent, skipped, cancelled = result
+        self.cancel_button.setEnabled(False)
+        self.log(f"Streamed {sent} row(s)"
+                 + (f", {skipped} not delivered (no connected device or send failed)" if skipped else "")
+                 + (" (cancelled)" if cancelled else ""))
+
+    def on_exception(self, ex):
+        self.cancel_button.setEnabled(False)
+        self.log(f"Streaming failed: {str(ex)}")
+
     def send_to_microbit(self):
         text = self.send_box.toPlainText().strip()
-        self.send_text_to_microbit(text)
\ No newline at end of file
+        self.send_text_to_microbit(text)
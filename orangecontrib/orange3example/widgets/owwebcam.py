@@ -4,11 +4,11 @@ from Orange.widgets import gui
 from AnyQt.QtWidgets import QLabel, QPushButton, QVBoxLayout
 from AnyQt.QtGui import QPixmap, QImage
 from AnyQt.QtCore import QTimer
-import sys
-import subprocess
-import threading
 import numpy as np
 
+from orangecontrib.orange3example.utils import tracing
+from orangecontrib.orange3example.widgets.tracepanel import TracePanel
+
 try:
     from orangecontrib.orange3example.utils import webcam
 except ImportError:
@@ -37,6 +37,9 @@ class OWWebcam(OWWidget):
         self.controlArea.layout().addWidget(self.stop_button)
         self.controlArea.layout().addWidget(self.capture_button)
 
+        self.trace_panel = TracePanel(prefixes=["webcam."])
+        self.controlArea.layout().addWidget(self.trace_panel)
+
         self.start_button.clicked.connect(self.start_webcam)
         self.stop_button.clicked.connect(self.stop_webcam)
         self.capture_button.clicked.connect(self.capture_image)
@@ -70,15 +73,18 @@ class OWWebcam(OWWidget):
         """Read webcam frame and display only (don't send output)"""
         if not webcam or not self.webcam_active:
             return
-        frame = webcam.read_frame()
+        with tracing.span("webcam.read_frame", "io"):
+            frame = webcam.read_frame()
         if frame is None:
             return
         
-        self.current_frame = frame.copy()
+        with tracing.span("webcam.copy_frame", "cpu"):
+            self.current_frame = frame.copy()
             
-        frame_qimage = cvt_frame_to_qimage(frame)
-        pixmap = QPixmap.fromImage(frame_qimage)
-        self.image_label.setPixmap(pixmap)
+        with tracing.span("webcam.render", "qt"):
+            frame_qimage = cvt_frame_to_qimage(frame)
+            pixmap = QPixmap.fromImage(frame_qimage)
+            self.image_label.setPixmap(pixmap)
         
 
     def capture_image(self):
@@ -91,8 +97,10 @@ class OWWebcam(OWWidget):
         except Exception:
             self.image_label.setText("OpenCV not installed. Cannot capture.\nInstall with 'pip install orange3-example[webcam]'.")
             return
-        frame_rgb = cv2.cvtColor(self.current_frame, cv2.COLOR_BGR2RGB)
-        self.send("Image", frame_rgb)
+        with tracing.span("webcam.convert_rgb", "cpu"):
+            frame_rgb = cv2.cvtColor(self.current_frame, cv2.COLOR_BGR2RGB)
+        with tracing.span("webcam.send_output", "qt"):
+            self.send("Image", frame_rgb)
 
 
 def cvt_frame_to_qimage(frame):
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+from AnyQt.QtWidgets import QGroupBox, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QTextEdit, QFileDialog
+from AnyQt.QtGui import QFont
+from AnyQt.QtCore import QTimer
+
+from orangecontrib.orange3example.utils import tracing
+
+
+class TracePanel(QGroupBox):
+    """Summary of tracing spans, with enable/clear/export controls.
+
+    prefixes limits the table to spans of the owning widget (and the shared
+    utils it calls); tracing itself is process-wide.
+    """
+
+    def __init__(self, prefixes=None, parent=None):
+        super().__init__("Trace Summary", parent)
+        self.prefixes = prefixes
+
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        button_layout = QHBoxLayout()
+        self.enable_checkbox = QCheckBox("Enable tracing")
+        self.enable_checkbox.setChecked(tracing.is_enabled())
+        self.enable_checkbox.toggled.connect(self.set_enabled)
+        button_layout.addWidget(self.enable_checkbox)
+
+        self.clear_button = QPushButton("Clear")
+        self.clear_button.clicked.connect(self.clear)
+        button_layout.addWidget(self.clear_button)
+
+        self.export_button = QPushButton("Export Chrome Trace...")
+        self.export_button.clicked.connect(self.export)
+        button_layout.addWidget(self.export_button)
+        layout.addLayout(button_layout)
+
+        self.summary_box = QTextEdit()
+        self.summary_box.setReadOnly(True)
+        self.summary_box.setMaximumHeight(120)
+        self.summary_box.setFont(QFont("Courier"))
+        layout.addWidget(self.summary_box)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+        self.refresh()
+
+    def set_enabled(self, enabled):
+        if enabled:
+            tracing.enable()
+        else:
+            tracing.disable()
+        self.refresh()
+
+    def clear(self):
+        tracing.clear()
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible() and self.summary_box.toPlainText():
+            return
+        self.enable_checkbox.setChecked(tracing.is_enabled())
+        self.summary_box.setPlainText(tracing.format_summary(self.prefixes))
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Chrome Trace", "trace.json", "Chrome trace (*.json)")
+        if path:
+            count = tracing.export_chrome_trace(path)
+            self.summary_box.append(f"\nExported {count} spans to {path}")
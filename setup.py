@@ -30,6 +30,9 @@ setup(
         "orange.widgets": (
             "Example Widgets = orangecontrib.orange3example.widgets",
         ),
+        "console_scripts": (
+            "orange3example-llm = orangecontrib.orange3example.cli:main",
+        ),
     },
     classifiers=[
         "Programming Language :: Python :: 3",
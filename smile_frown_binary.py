@@ -0,0 +1,78 @@
+# Binary framing version of smile_frown.py
+# frame: 0xA5 | type | length (UInt16LE) | payload | crc16 (UInt16LE, CCITT-FALSE over type..payload)
+SYNC = 0xA5
+FRAME_TEXT = 0x01
+FRAME_INT16 = 0x03
+FRAME_ACK = 0x06
+
+binary_mode = False
+
+def crc16(buf: Buffer, crc: number):
+    for i in range(len(buf)):
+        crc ^= buf[i] << 8
+        for bit in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+    return crc
+
+def send_frame(frame_type: number, payload: Buffer):
+    frame = pins.create_buffer(6 + len(payload))
+    frame[0] = SYNC
+    frame[1] = frame_type
+    frame.set_number(NumberFormat.UINT16_LE, 2, len(payload))
+    frame.write(4, payload)
+    crc = crc16(frame.slice(1, 3 + len(payload)), 0xFFFF)
+    frame.set_number(NumberFormat.UINT16_LE, 4 + len(payload), crc)
+    serial.write_buffer(frame)
+
+def show(command: str):
+    if command == "smile":
+        basic.show_icon(IconNames.HAPPY)
+    elif command == "frown":
+        basic.show_icon(IconNames.SAD)
+    elif command == "straight":
+        basic.show_icon(IconNames.ASLEEP)
+    else:
+        basic.clear_screen()
+
+def binary_loop():
+    while True:
+        if serial.read_buffer(1)[0] != SYNC:
+            continue
+        header = serial.read_buffer(3)
+        length = header.get_number(NumberFormat.UINT16_LE, 1)
+        payload = serial.read_buffer(length) if length > 0 else pins.create_buffer(0)
+        crc = serial.read_buffer(2).get_number(NumberFormat.UINT16_LE, 0)
+        if crc16(payload, crc16(header, 0xFFFF)) != crc:
+            continue
+        if header[0] == FRAME_TEXT:
+            # 6-byte ACK instead of "Received: smile - showing happy icon",
+            # sent before show() so the icon pause does not hold up the host
+            send_frame(FRAME_ACK, pins.create_buffer(0))
+            show(payload.to_string())
+
+def on_data_received():
+    global binary_mode
+    if binary_mode:
+        return
+    buffer = serial.read_until(serial.delimiters(Delimiters.NEW_LINE)).trim()
+    if buffer == "@proto bin":
+        serial.write_line("@proto bin ok")
+        binary_mode = True
+        control.in_background(binary_loop)
+    else:
+        show(buffer)
+        serial.write_string("Received: " + buffer + "\n")
+serial.on_data_received(serial.delimiters(Delimiters.NEW_LINE), on_data_received)
+
+def on_forever():
+    # Light level and temperature as one packed int16 frame (10 bytes)
+    if binary_mode:
+        payload = pins.create_buffer(4)
+        payload.set_number(NumberFormat.INT16_LE, 0, input.light_level())
+        payload.set_number(NumberFormat.INT16_LE, 2, input.temperature())
+        send_frame(FRAME_INT16, payload)
+        basic.pause(20)
+basic.forever(on_forever)